@@ -35,214 +35,126 @@ The high score is being saved and updated when beaten.
 """
 
 from scene import *
-from random import *
-import random
 import math 
-import sound
+import time
 from menus import MenuScene
-
-#The following constants determine the basic game parameters for the bees and the power-ups. 
-
-PLAYERLIVES = 3 
-
-BEESPEED = 1 #Determines the amount with which the enemy bees change their speed at a given time step 
-BEEFREQUENCY = 4 #Determines how often a new enemy bee appears
-
-FLOWERFREQUENCY = 40 #Determines how often a new flower appears
-HONEYCOMBFREQUENCY = 6 #Determines how often a new honeycomb appears
-HEARTFREQUENCY = 90 #Determines how often a new heart appears
-LIGHTNINGFREQUENCY = 90 #Determines how often a new lightning appears
-MUSHROOMFREQUENCY = 100 #Determines how often a new mushroom appears
+from background import add_wall
+from shapes import ovals
+from pools import NodePool
+from replay import Recorder, Replay, THUNDER
+from profiler import Profiler, NullProfiler
+from persistence import BackgroundWriter
+from scores import ScoreHistory
+from controllers import Planner
+from quality import Governor
+from audio import Mixer
+from particles import Emitter
+from effects import Blinker
+from tilt import TiltInput, GravitySource
+import snapshot
+from swarm import NumpySwarm
+from simulation import World, Swarm, FLOWER, HONEYCOMB, HEART, LIGHTNING, MUSHROOM
+
+#The game parameters, and all of the game logic, live in simulation.py. The classes and the 
+#Game scene in this file only mirror the state of the simulated world on the screen. 
+
+PROFILE = False #Shows the time spent in each stage of the update loop in the top right corner 
+TICK_RATE = 60 #The number of times per second the world is advanced, which may be lower than the frame rate 
+AUTOPLAY = False #Lets the planner in controllers.py play the game in place of the gravity sensor and the taps 
+NUMPY_SWARM = False #Moves the enemy bees in one batch with NumPy (see swarm.py), which keeps very crowded hives cheap 
+AUTOSAVE = 10 #The number of seconds between the snapshots of the game in progress 
+SNAPSHOT = '.beehive_snapshot' #The snapshot from which an unfinished game is resumed 
+LAST_REPLAY = '.beehive_last_replay' #The replay of the last game played, which can be watched from the menus 
+
+#The diameter of the paths of the bees that grow and shrink by scaling, see Bee.sync. 
+SCALED = 20
 
 #The class for the enemy bees. Each bee is represented by a yellow circle with a black centre. 
 class Bee (ShapeNode):
         def __init__(self, **kwargs):
-                ShapeNode.__init__(self, ui.Path.oval(0, 0, 0, 0), 'yellow', **kwargs) 
-                self.child = ShapeNode(ui.Path.oval(0, 0, 0, 0), 'black')
+                ShapeNode.__init__(self, ovals.get(0), 'yellow', **kwargs) 
+                self.child = ShapeNode(ovals.get(0), 'black')
                 self.add_child(self.child)
                 
-                self.age = 0 
-                self.speedup = 0
-                self.speedright = 0
-                self.fully_grown = randint(150, 250)
-                self.entrance_x = 0
-                self.entrance_y = 0
-                self.inHive = False
-                self.dying = False
-                self.dead = False
-                
-        #This function controls how the enemy bees enter the hive. The bees grow gradually 
-        #to their fully grown size. This size is increased with time: Every 240 seconds, 
-        #another multiple of fully_grown is added to the size of the new-born bees.  
-        def enter(self, time):
-                if not self.inHive:
-                        if self.age < int((1 + (time / 240)) * self.fully_grown):
-                                self.age += 1
-                                t = self.age
-                                self.path = ui.Path.oval(0, 0, 0.1 * t, 0.1 * t)
-                                self.child.path = ui.Path.oval(0, 0, 0.05 * t, 0.05 * t)
-                        else:
-                                self.inHive = True
+                self.diameter = 0 
+
+        #Prepares a recycled node for a new bee. 
+        def reset(self):
+                self.diameter = -1
+                self.scale = 1
         
-        #This function controls the movement of the enemy bees. For every second cycle of the update loop, they change their
-        #velocity in a random fashion, dictated by BEESPEED. The function makes sure the bees do not exceed
-        #their speed limit, and that they do not move out of bounds. 
-        def move(self, time, width, height, beeSpeedLimit):
-                if self.inHive and not self.dead:
-                        t = time % 2
-
-                        if t == 0:
-                                v = self.speedright
-                                w = self.speedup
-
-                                if v > beeSpeedLimit:
-                                        v -= randint(0, BEESPEED)
-                                elif v < - beeSpeedLimit:
-                                        v += randint(0,BEESPEED)
-                                else: 
-                                        v += randint(-BEESPEED, BEESPEED)
-
-                                if (self.position.x < 0) and (v < 0):  
-                                        v = -v
-                                elif (self.position.x > width) and (v > 0):
-                                        v = -v 
-
-                                if w > beeSpeedLimit:
-                                        w -= randint(0, BEESPEED)
-                                elif w < - beeSpeedLimit:    
-                                        w += randint(0,BEESPEED) 
-                                else: 
-                                        w += randint(-BEESPEED, BEESPEED)
-
-                                if (self.position.y < 0) and (w < 0):
-                                        w = -w
-                                elif (self.position.y > height) and (w > 0):
-                                        w = -w 
-
-                                self.speedright = v
-                                self.speedup = w
-                                self.position += (v, w)
+        #Mirrors the state of the bee in the world, alpha of the way between its positions at 
+        #the last two ticks. The size of the bee is given by its age, and changes as it enters 
+        #the hive or dies. The paths are taken from the shared cache, and only swapped when the 
+        #rounded diameter changes. With scale_only set, and for the dying bees, which shrink a 
+        #little every frame, the paths are kept at the size SCALED, and the node is scaled instead. 
+        def sync(self, bee, alpha=1, scale_only=False):
+                self.place(bee.px + alpha * (bee.x - bee.px), bee.py + alpha * (bee.y - bee.py), bee.age, bee.dying, scale_only)
+
+        #Shows the bee at (x, y), with the size given by its age. 
+        def place(self, x, y, age, dying, scale_only=False):
+                self.position = (x, y)
+                d = ovals.quantize(0.1 * age)
+                if scale_only or dying:
+                        if self.diameter != SCALED:
+                                self.diameter = SCALED
+                                self.path = ovals.get(SCALED)
+                                self.child.path = ovals.get(0.5 * SCALED)
+                        self.scale = d / SCALED
+                elif d != self.diameter:
+                        self.diameter = d
+                        self.path = ovals.get(d)
+                        self.child.path = ovals.get(0.5 * d)
         
-        #This function controls the dying of the enemey bees when they get hit by the 
-        #player with a flower power-up. When this happens, the enemy bee goes into a 
-        #tail spin and drops to the floor of the hive. As it hits the floor, a dust cloud
-        #rises and then evaporates. 
-        def die(self, list):
-                if self.dying: 
-                        r = self.age
-                        if r > 90:  
-                                self.path = ui.Path.oval(0, 0, 0.1 * r, 0.1 * r)
-                                self.child.path = ui.Path.oval(0, 0, 0.05 * r, 0.05 * r)
-                                s = 0.5 * r / self.fully_grown
-                                radius = s * 12
-                                angle1 = (r / 15) * 2 * 3.14
-                                angle2 = ((r +1) / 15) * 2 * 3.14
-
-                                c1 = radius * (math.cos(angle2) - math.cos(angle1))
-                                c2 = radius * (math.sin(angle2) - math.sin(angle1))
-
-                                self.position += (c1, c2)
-                                self.age -= 1
-                        if r == 90:
-                                self.dead = True
-                                sound.play_effect('arcade:Explosion_5')
-
-                                dustlist = []
-
-                                for i in range(10):
-                                        r = randint(3, 7)
-                                        dustlist.append(ShapeNode(ui.Path.oval(0, 0, r, r), 'white'))
-                                        self.add_child(dustlist[i])
-                                        c1 = 7 * math.cos((i/5) * math.pi)
-                                        c2 = 7 * math.sin((i/5) * math.pi)
-                                        dustlist[i].position = (c1, c2)
-
-                                self.run_action(Action.fade_to(0, 1))
-                                list.remove(self)
+        #As the enemy bee hits the floor of the hive after its tail spin, it evaporates in a 
+        #cloud of dust (see Game.bury), after which the node is returned to the pool. 
+        def die(self, pool):
+                self.run_action(Action.sequence([Action.fade_to(0, 1), pool.recycle(self)]))
 
 #The class of the player, repsresented by a black circle with a yellow centre.                                 
 class Player (ShapeNode):
         def __init__(self, **kwargs):
-                ShapeNode.__init__(self, ui.Path.oval(0, 0, 20, 20), 'black', **kwargs) 
-                self.child = ShapeNode(ui.Path.oval(0, 0, 10, 10), 'yellow')
+                ShapeNode.__init__(self, ovals.get(20), 'black', **kwargs) 
+                self.child = ShapeNode(ovals.get(10), 'yellow')
                 self.add_child(self.child)
                 
-                self.lives = PLAYERLIVES
-                self.honeycombscollected = 0
-                self.diameter = 20 #While self.size.x =21 - some sort of rounding error? 
-                self.age = 200 #Adapted from Bee class
-                self.fully_grown = 200 #Adapted from Bee class
-                self.immune = False
-                self.attack = False 
-                self.dying = False
-                self.half_dead = False
-                self.dead = False
+                self.diameter = 20 
+                self.blinker = Blinker(self)
+                self.centre_blinker = Blinker(self.child)
+
+        #Prepares the node for a new game. 
+        def reset(self):
+                self.remove_all_actions()
+                self.child.remove_all_actions()
+                self.blinker.stop()
+                self.centre_blinker.stop()
+                self.diameter = -1
                 
-        #This function changes the size of the player as need in connection with 
-        #the mushroom and black flower power-ups. 
-        def change_size(self, factor):
-                r = self.position.x
-                s = self.position.y
-
-                self.diameter *= factor
-                X = self.diameter
-                Y = X / 2
-
-                self.path = ui.Path.oval(r, s, X, X)
-                self.child.path = ui.Path.oval(r, s, Y, Y)
-        
-        #Same as the above function, but ensuring the dimensions of the 
-        #player are integers. 
-        def change_size_int(self, factor):
-                r = self.position.x
-                s = self.position.y
-
-                x = self.diameter
-                X = round(factor * x)
-                Y = round(X / 2)
-
-                self.path = ui.Path.oval(r, s, X, X)
-                self.child.path = ui.Path.oval(r, s, Y, Y)
-
-        def change_death(self):
-                self.dead = True
+        #Mirrors the state of the player in the world. The size of the player is given by its 
+        #age, which changes as the player grows or shrinks and as it dies. 
+        def sync(self, player, alpha=1):
+                self.position = (player.px + alpha * (player.x - player.px), player.py + alpha * (player.y - player.py))
+                d = ovals.quantize(0.1 * player.age)
+                if d != self.diameter:
+                        self.diameter = d
+                        self.path = ovals.get(d)
+                        self.child.path = ovals.get(0.5 * d)
+
+        #Shows the timed states of the player at the time t (see effects.py): The player blinks 
+        #while it is immune and pulses while a red flower has doubled its size, and its centre 
+        #blinks while it is in attack mode. 
+        def show_effects(self, player, t):
+                if player.immune:
+                        self.blinker.play('immunity', player.immune_until)
+                elif t < player.giant_until:
+                        self.blinker.play('giant', player.giant_until)
+                else:
+                        self.blinker.play(None)
+                self.centre_blinker.play('attack' if player.attack else None, player.attack_until)
         
-        #This function controls the death of the player, after it has run out of lives. 
         #Adapted from the correspoding function for the enemy bees above. 
         def die(self):
-                if self.dying: 
-                        r = self.age
-                        if r > 90:  
-                                self.path = ui.Path.oval(0, 0, 0.1 * r, 0.1 * r)
-                                self.child.path = ui.Path.oval(0, 0, 0.05 * r, 0.05 * r)
-                                s = 0.5 * r / self.fully_grown
-                                radius = s * 12
-                                angle1 = (r / 15) * 2 * 3.14
-                                angle2 = ((r +1) / 15) * 2 * 3.14
-
-                                c1 = radius * (math.cos(angle2) - math.cos(angle1))
-                                c2 = radius * (math.sin(angle2) - math.sin(angle1))
-
-                                self.position += (c1, c2)
-                                self.age -= 1
-                        if 0 < r <= 90:
-                                self.half_dead = True
-                                self.age = 0
-                                sound.play_effect('arcade:Explosion_4')
-
-                                dustlist = []
-
-                                for i in range(10):
-                                        r = randint(3, 7)
-                                        dustlist.append(ShapeNode(ui.Path.oval(0, 0, r, r), 'white'))
-                                        self.add_child(dustlist[i])
-                                        c1 = 7 * math.cos((i/5) * math.pi)
-                                        c2 = 7 * math.sin((i/5) * math.pi)
-                                        dustlist[i].position = (c1, c2)
-
-                                actions = [Action.fade_to(0,1), Action.call(self.change_death)]
-
-                                self.run_action(Action.sequence(actions))
+                self.run_action(Action.fade_to(0, 1))
 
 
 #This is the class for the flower power-up, enabling the player to go into attack mode and 
@@ -252,12 +164,7 @@ class Flower (ShapeNode):
                 ShapeNode.__init__(self, ui.Path.oval(0, 0, 8, 8), 'black', **kwargs) 
 
                 self.farbe = farbe 
-
-                self.birthtime = 0
                 self.z_position = 0.5
-                
-                self.dead = False 
-                
 
                 petals = []
 
@@ -269,165 +176,67 @@ class Flower (ShapeNode):
                 cen = ShapeNode(ui.Path.oval(0, 0, 5,5), 'yellow')
                 self.add_child(cen)
 
-        
-        #This function removes the flower if it is picked up, or if it is not picked up within a given time. 
-        def die(self, list, time):
-                if time - self.birthtime > 3:
-                        self.run_action(Action.fade_to(0, 0.1))
-                        list.remove(self)
-
-#This is the class for the honeycombs. The aim of the game is for the player to collect these. 
-class Honeycomb (ShapeNode):
-        def __init__(self, **kwargs):
-                SpriteNode.__init__(self,'pzl:Yellow5', **kwargs)
-
-                self.size = (12, 12)
-
-                self.birthtime = 0
-                self.z_position = 0.5
-                self.dead = False 
-
-        #This function removes the honeycomb if it is picked up, or if it is not picked up within a given time. 
-        def die(self, list, time):
-                if time - self.birthtime > 5:
-                        self.run_action(Action.fade_to(0, 0.1))
-                        list.remove(self)               
-
-#This is the class for the heart. Collecting a heart gives an extra life.                        
-class Heart (ShapeNode):
-        def __init__(self, **kwargs):
-                SpriteNode.__init__(self,'plc:Heart', **kwargs)
-
-                self.size = (15,23)
-
-                self.birthtime = 0 
-                self.z_position = 0.5
-                self.dead = False
-
-        #This function removes the heart if it is picked up, or if it is not picked up within a given time.
-        def die(self, list, time):
-                if time - self.birthtime > 5:
-                        self.run_action(Action.fade_to(0, 0.1))
-                        list.remove(self)               
-#This is the class of the lightning power-up. 
-class Lightning (ShapeNode):
-        def __init__(self, **kwargs):
-                SpriteNode.__init__(self,'spc:BoltGold', **kwargs)
-
-                self.size = (15,23)
-
-                self.birthtime = 0 
-                self.z_position = 0.5
-                self.dead = False
-
-        #This function removes the lightning if it is picked up, or if it is not picked up within a given time.
-        def die(self, list, time):
-                if time - self.birthtime > 5:
-                        self.run_action(Action.fade_to(0, 0.1))
-                        list.remove(self)               
-
-#This class is for the thunderbolt. This is used to keep track of the number of lighnings currently
-#in the player's possesion. This is indicated in the bottom left of the screen. Pressing the symbol 
-#of a thunderbolt stuns the enemy bees. 
-class Thunderbolt (ShapeNode):
-        def __init__(self, **kwargs):
-                SpriteNode.__init__(self,'emj:High_Voltage_Sign', **kwargs)
-
-                self.size = (35,40)
-
-                self.birthtime = 0 
-                self.z_position = 0.5
-                self.dead = False
-
-        #This function removes the thunderbolt when it is being tapped to release the lightning. 
-        def die(self, list, time):
-                if time - self.birthtime > 5:
-                        self.run_action(Action.fade_to(0, 0.1))
-                        list.remove(self)               
-
-#This is the class of the mushroom. Collecting a mushroom makes the player halve in size, 
-#and so makes it easier to avoid the enemy bees, but also more difficult to bring them down
-#when a flower has been collected. 
-class Mushroom (ShapeNode):
-        def __init__(self, **kwargs):
-                SpriteNode.__init__(self,'plf:Tile_MushroomRed', **kwargs)
-
-                self.size = (35,40)
+#The class of the honeycombs, the heart, lightning and mushroom power-ups and the thunderbolts, 
+#which only differ in their texture and size, as given in SPRITES below. 
+class Sprite (SpriteNode):
+        def __init__(self, texture, size, **kwargs):
+                SpriteNode.__init__(self, texture, **kwargs)
 
-                self.birthtime = 0 
+                self.size = size
                 self.z_position = 0.5
-                self.dead = False
 
-        #This function removes the mushroom if it is picked up, or if it is not picked up within a given time.
-        def die(self, list, time):
-                if time - self.birthtime > 5:
-                        self.run_action(Action.fade_to(0, 0.1))
-                        list.remove(self)               
+#The texture and size of each kind of sprite: 
+#Honeycomb: The aim of the game is for the player to collect these. 
+#Heart: Collecting a heart gives an extra life. 
+#Lightning: The lightning power-up, kept as a thunderbolt as it is collected. 
+#Mushroom: Collecting a mushroom makes the player halve in size, and so makes it easier to avoid the 
+#enemy bees, but also more difficult to bring them down when a flower has been collected. 
+#Thunderbolt: Used to keep track of the number of lighnings currently in the player's possesion. 
+#This is indicated in the bottom left of the screen. Pressing the symbol of a thunderbolt stuns 
+#the enemy bees. 
+THUNDERBOLT = 'thunderbolt'
+SPRITES = {
+        HONEYCOMB: ('pzl:Yellow5', (12, 12)),
+        HEART: ('plc:Heart', (15, 23)),
+        LIGHTNING: ('spc:BoltGold', (15, 23)),
+        MUSHROOM: ('plf:Tile_MushroomRed', (35, 40)),
+        THUNDERBOLT: ('emj:High_Voltage_Sign', (35, 40)),
+}
+
+def sprite_factory(kind):
+        texture, size = SPRITES[kind]
+        return lambda: Sprite(texture, size)
+
+#The sounds played for the events of the world, and as the pickups are collected. 
+SOUNDS = {'bees_killed': 'arcade:Laser_2', 'bees_dead': 'arcade:Explosion_5', 'player_hit': 'digital:LowDown', 'player_dying': 'arcade:Jump_1', 'player_half_dead': 'arcade:Explosion_4', 'thunder_released': 'arcade:Powerup_2'}
+PICKUP_SOUNDS = {FLOWER: 'arcade:Powerup_1', HONEYCOMB: 'arcade:Coin_4', HEART: 'arcade:Powerup_3', LIGHTNING: 'arcade:Powerup_2', MUSHROOM: 'arcade:Jump_1'}
 
 
 #The class that controls the running of the game. 
 class Game (Scene):
         def setup(self):
                 self.background_color = 'yellow' #Later replaced with the hexagonal background pattern 
-                self.time = 0 #Increased manually by one for each cycle of the update loop
-                self.speed_limit = 3 #The speed limit of the enemy bees
-                self.buzzing = False #Keeps track of whether the enemy bees have been stirred or not 
-                self.time_last_buzz = 0 
-                self.thunder = False #Keeps track of whether the enemy bees have been struck by a lightning power-up
-                self.beebirth = True #Keeps track of whether a bee can be born
-                self.flowergrowth = True #Keeps track of whether a flower can grow
-                self.flowerbirth = 0
-                self.flowercounter = 0 # Keeps track of the number of flowers as there are two types
-                self.honeycombgrowth = True #Keeps track of whether a honeycomb can appear 
-                self.honeycombbirth = 0
-                self.heartgrowth = True #Keeps track of whether a heart can appear
-                self.heartbirth = 0
-                self.lightninggrowth = True #Keeps track of whether a lightning can appear
-                self.lightningbirth = 0
-                self.mushroomgrowth = True #Keeps track of whether a mushroom can appear
-                self.mushroombirth = 0
-                
-                #Resets the iPhone's gyroscope used to move the player. 
-                self.gx = 0
-                self.gy = 0
-                self.factor_x = 1
-                self.factor_y = 1
-
-                #The following parameters and for-loops create the hexagonal background effect. 
-                m = 17
-                k = (m-1) * 2 * math.sqrt(3) + 2
-                r = self.size.w / k
-                s = int(self.size.h / (2 * r)) 
-
-                wall = Node(parent=self)
-
-                for i in range(m): 
-                        for j in range(s + 1):
-                                face = ShapeNode(ui.Path.oval(0, 0, 2 * r, 2 * r), '#c17c00')
-                                wall.add_child(face)
-                                face.position = (r + 2 * math.sqrt(3) * r * i, r + 2 * r * j)
-
-                for i in range(m + 1):
-                        for j in range(s + 2):
-                                face = ShapeNode(ui.Path.oval(0, 0, 2 * r, 2 * r), '#c17c00')
-                                wall.add_child(face)
-                                face.position = (r - math.sqrt(3) * r + 2 * math.sqrt(3) * r * i, 2 * r * j)
-
-
-
-                #Lists for the enemy bees, honeycombs and power-ups. 
-                self.bees = []
-                self.flowers = []
-                self.honeycombs = []
-                self.hearts = []
-                self.lightnings =[]
+                swarm = NumpySwarm if NUMPY_SWARM else Swarm
+                self.world = World(self.size.w, self.size.h, swarm=swarm, tick_rate=TICK_RATE) #The simulated state of the game 
+
+                #The hexagonal background effect, drawn once and shown as a single sprite. 
+                self.wall = add_wall(self, m=17)
+                self.wall.z_position = -1
+
+                #The nodes of the player, the enemy bees, the honeycombs and power-ups. The nodes of the 
+                #bees and pickups are kept in dictionaries keyed by their state in the world. 
+                self.player = Player()
+                self.bees = {}
+                self.pickups = {}
                 self.thunderbolts = []
-                self.mushrooms = []
+
+                #The nodes that have left the scene, ready to be used again. 
+                self.bee_pool = NodePool(Bee)
+                self.pickup_pools = {}
+                self.thunderbolt_pool = NodePool(sprite_factory(THUNDERBOLT))
                 
                 #The following block creates the counters for the number of collected honeycombs
                 #and the number of lives left shown in the top left corner of the screen. 
-                self.score = 0
-                self.lives = PLAYERLIVES
                 score_font = ('Futura',15)
                 lives_font = ('Futura',15)
                 self.honey = SpriteNode('pzl:Yellow1')
@@ -441,7 +250,7 @@ class Game (Scene):
                 self.heart.position = (30, self.size.h - 45)
                 self.heart.z_position = 2
                 self.score_label = LabelNode('0', score_font, parent=self, color = 'black')
-                self.lives_label = LabelNode('5', lives_font, parent=self, color = 'black') #This is set to PLAYERLIVES for each new game. 
+                self.lives_label = LabelNode('5', lives_font, parent=self, color = 'black') #This shows the lives of the world (Parameters.player_lives as a game starts). 
                 #self.score_label.anchor_point = (0,0)
                 #self.lives_label.anchor_point = (0,0)
                 self.score_label.position = (55, self.size.h - 20)
@@ -449,195 +258,257 @@ class Game (Scene):
                 self.score_label.z_position = 2
                 self.lives_label.z_position = 2
 
+                #The profiler, and the overlay showing the p50 and p99 times of each stage. The 
+                #profile of the last game is saved as it ends. 
+                self.profiler = NullProfiler()
+                self.dead = [] #The bees that have hit the floor of the hive during the frame, see bury 
+
+                #The particles of all dust clouds, see particles.py. 
+                self.emitter = Emitter(self)
+                self.profile_labels = []
+                if PROFILE:
+                        self.profiler = Profiler()
+                        self.world.profiler = self.profiler
+
+                #The governor of the quality tiers, which sheds load as the frames take too long. 
+                self.governor = Governor()
+                self.last_sound = -1
+
+                #The sound effects are loaded and played by a thread of their own, see audio.py. 
+                self.mixer = Mixer(set(SOUNDS.values()) | set(PICKUP_SOUNDS.values()))
+
+                #The controller standing in for the player, if any. 
+                self.controller = Planner() if AUTOPLAY else None
+
+                #The tilt of the phone is sampled and smoothed by a thread of its own, see tilt.py. 
+                self.tilt = TiltInput(GravitySource())
+                self.tilt.start()
+
+                #Every game is recorded, and the replay of the last game is saved as it ends. It can be 
+                #watched from the menus. 
+                self.recorder = None
+                self.replay = None
+                self.last_replay = self.load_replay()
+
+                #The high score, replays and profiles are written by a thread of their own, so that 
+                #writing a file never holds up the update loop. 
+                self.writer = BackgroundWriter()
                 self.load_highscore()
+
+                #Every finished game is added to the score history. 
+                self.history = ScoreHistory()
+
+                #The game in progress is saved every few seconds, and as the app goes to the background, 
+                #so that it can be resumed from the start menu. 
+                self.last_autosave = 0
+                self.saved = None
                 self.show_start_menu()
         
-        #Resets all variables as a new game is being started. 
-        def new_game(self):     
-                self.t = 0 #Time in seconds since the game started 
-                self.time = 0  
-                self.speed_limit = 3
-                self.buzzing = False 
-                self.time_last_buzz = 0 
-                self.thunder = False
-                self.time_last_thunder = 0
-                self.beebirth = True
-                self.flowergrowth = True
-                self.honeycombgrowth = True
-                self.heartgrowth = True
-                self.lightninggrowth = True
-                self.mushroomgrowth = True
-                
-                self.gx = 0
-                self.gy = 0
-                self.factor_x = 1
-                self.factor_y = 1
+        #Resets the world and returns all nodes to their pools as a new game is being started. 
+        def new_game(self, seed=None):     
+                self.world.new_game(seed)
+                self.recorder = Recorder(self.world.seed, self.world.width, self.world.height, self.world.tick_rate)
+                self.reset_nodes()
+
+        #Continues the game stored in a snapshot. The replay of a resumed game is not recorded, 
+        #as it cannot be played from the start. 
+        def resume(self, data):
+                profiler = self.world.profiler
+                self.world = snapshot.loads(data, swarm=self.world.swarm_class)
+                self.world.profiler = profiler
+                self.recorder = None
+                self.reset_nodes()
+
+                #The restored world has emitted the births of its bees and pickups. 
+                events = self.world.events
+                self.world.events = []
+                self.handle(events)
+                for i in range(self.world.thunderbolts):
+                        self.thunderbolts.append(self.thunderbolt_pool.get(self))
+                self.sort_thunderbolts()
+
+        def reset_nodes(self):
+                self.replay = None
+                self.last_autosave = self.world.t
+                if self.controller:
+                        self.controller.reset(self.world)
+                self.tilt.calibrate()
+                self.governor.reset()
+                self.last_sound = -1
                 
-                self.player = Player(parent=self) #Initializes the player
-                self.player.position = (self.size.w/2, self.size.h / 2)
+                self.player.remove_from_parent()
+                self.player.reset()
+                self.add_child(self.player)
+                self.player.sync(self.world.player)
                 
-                for b in self.bees:
-                        b.remove_from_parent()
-                self.bees = []
-                for f in self.flowers:
-                        f.remove_from_parent()
-                self.flowers = []
-                for h in self.honeycombs:
-                        h.remove_from_parent()
-                self.honeycombs = []
-                for h in self.hearts:
-                        h.remove_from_parent()
-                self.hearts = []
-                for l in self.lightnings:
-                        l.remove_from_parent()
-                self.lightnings = []
+                for b in self.bees.values():
+                        self.bee_pool.put(b)
+                self.bees = {}
+                self.dead = []
+                self.emitter.clear()
+                for pickup, node in self.pickups.items():
+                        self.pickup_pool(pickup.kind, pickup.farbe).put(node)
+                self.pickups = {}
                 for t in self.thunderbolts:
-                        t.remove_from_parent()
+                        self.thunderbolt_pool.put(t)
                 self.thunderbolts = []
-                for m in self.mushrooms:
-                        m.remove_from_parent()
-                self.mushrooms = []
 
-                self.score = 0
-                self.lives = PLAYERLIVES
-                self.score_label.text = str(self.score)
-                self.lives_label.text = str(self.lives)
+                self.update_labels()
 
-        #The update()-method updates the screen approximately 60 times per second. 
+        #The update()-method updates the screen approximately 60 times per second. The world is 
+        #advanced by the ticks that fit into the time since the last frame, after which the events 
+        #of the ticks are handled by the on_* methods below and the nodes are moved to the positions 
+        #of their counterparts in the world, interpolated between the last two ticks. 
         def update(self):
-                self.set_position()
-                self.update_player2()
-                self.check_buzz()
-                self.check_thunder()
-                self.spawn_bee()
-                self.grow_flower()
-                self.grow_honeycomb()
-                self.grow_heart()
-                self.grow_lightning()
-                self.grow_mushroom()
-                self.check_lives()
+                start = time.perf_counter()
+                p = self.profiler
+                p.begin()
+                frame = self.read_input()
+                if frame is None:
+                        return
+                dt, u, v = frame
+                p.lap('read')
+                events = self.world.advance(dt, u, v)
+                self.handle(events)
+                self.bury()
+                p.lap('events')
                 
-                self.player.die()
-
-                for bee in self.bees:
-                        bee.enter(self.t)
-                        bee.move(self.time, self.size.w, self.size.h, self.speed_limit)
-                        self.bee_collision(bee)
-                        self.bee_collision2(bee)
-                        bee.die(self.bees)
-
-                for flower in self.flowers: 
-                        self.flower_collision(flower)
-                        flower.die(self.flowers, self.t)
-
-                for honeycomb in self.honeycombs:
-                        self.honeycomb_collision(honeycomb)
-                        honeycomb.die(self.honeycombs, self.t)
-
-                for heart in self.hearts:
-                        self.heart_collision(heart)
-                        heart.die(self.hearts, self.t)
-
-                for lightning in self.lightnings:
-                        self.lightning_collision(lightning)
-                        lightning.die(self.lightnings, self.t)
-
-                for mushroom in self.mushrooms:
-                        self.mushroom_collision(mushroom)
-                        mushroom.die(self.mushrooms, self.t)
-
-                self.time += 1          
+                alpha = self.world.alpha
+                scale_only = self.governor.tier.scale_only
+                self.player.sync(self.world.player, alpha)
+                self.player.show_effects(self.world.player, self.world.t)
+                self.sync_bees(alpha, scale_only)
+                self.emitter.update(self.dt)
+                p.lap('nodes')
+                p.end()
+
+                self.mixer.flush()
+                if self.governor.frame(self.dt, time.perf_counter() - start):
+                        self.apply_quality()
+
+                if PROFILE and p.frames % 30 == 0:
+                        self.show_profile()
+
+                if not self.world.over and self.replay is None and self.world.t - self.last_autosave >= AUTOSAVE:
+                        self.autosave()
+
+        #Moves the nodes of the bees to the positions of the bees in the world. The state of the 
+        #bees of a NumpySwarm is read from its arrays in one batch (see NumpySwarm.frame), since 
+        #reading the attributes of its bees one at a time is much slower than the swarm itself. 
+        def sync_bees(self, alpha, scale_only):
+                swarm = self.world.swarm
+                if isinstance(swarm, NumpySwarm):
+                        nodes = self.bees
+                        for bee, x, y, age, dying in zip(swarm.bees, *swarm.frame(alpha)):
+                                nodes[bee].place(x, y, age, dying, scale_only)
+                else:
+                        for bee, node in self.bees.items():
+                                node.sync(bee, alpha, scale_only)
+
+        #Calls the on_* method for each event of the world. 
+        def handle(self, events):
+                for name, entity in events:
+                        handler = getattr(self, 'on_' + name, None)
+                        if handler:
+                                handler(entity)
+
+        #Takes a snapshot of the game in progress, which is written by the background writer. 
+        def autosave(self):
+                self.last_autosave = self.world.t
+                self.writer.write(SNAPSHOT, snapshot.dumps(self.world))
+
+        #Shows or hides the wall as the quality tier changes, and lets the bees take the paths 
+        #of their size again as they stop growing by scaling. 
+        def apply_quality(self):
+                tier = self.governor.tier
+                if tier.wall and not self.wall.parent:
+                        self.add_child(self.wall)
+                elif not tier.wall and self.wall.parent:
+                        self.wall.remove_from_parent()
+                if not tier.scale_only:
+                        for node in self.bees.values():
+                                if node.scale != 1:
+                                        node.scale = 1
+                                        node.diameter = -1
+
+        #Plays a sound effect as the frame ends, unless the last one was played less than the sound 
+        #interval of the quality tier ago. 
+        def play_sound(self, name):
+                if self.world.t - self.last_sound >= self.governor.tier.sound_interval:
+                        self.last_sound = self.world.t
+                        self.mixer.play(name)
+
+        #Shows the report of the profiler in the top right corner, one label per stage. 
+        def show_profile(self):
+                lines = self.profiler.report()
+                while len(self.profile_labels) < len(lines):
+                        label = LabelNode('', ('Menlo', 9), parent=self, color='black')
+                        label.anchor_point = (1, 1)
+                        label.position = (self.size.w - 5, self.size.h - 5 - 11 * len(self.profile_labels))
+                        label.z_position = 3
+                        self.profile_labels.append(label)
+                for label, line in zip(self.profile_labels, lines):
+                        label.text = line
         
+        #Returns the time since the last update and the velocity of the player, as last worked out 
+        #from the tilt of the phone by the thread of the TiltInput (or as given by the controller 
+        #standing in for it), which are recorded as they are read. While a replay is running, the 
+        #recorded inputs are used instead, and None is returned as the replay runs out. 
+        def read_input(self):
+                if self.replay is not None:
+                        frame = next(self.replay, None)
+                        if frame is None:
+                                self.replay = None
+                                self.game_over()
+                                return None
+                        dt, u, v, flags = frame
+                        if flags & THUNDER and self.thunderbolts:
+                                self.release_thunder(self.thunderbolts[0])
+                        return dt, u, v
+
+                if self.controller:
+                        u, v, thunder = self.controller.control(self.world)
+                        if thunder and self.thunderbolts:
+                                self.release_thunder(self.thunderbolts[0])
+                else:
+                        u, v = self.tilt.velocity()
+                if self.recorder:
+                        return self.recorder.frame(self.dt, u, v)
+                return self.dt, u, v
+
+        #Starts a new game that replays a recorded one (see replay.py). 
+        def play_replay(self, replay):
+                profiler = self.world.profiler
+                self.world = World(replay.width, replay.height, swarm=self.world.swarm_class, tick_rate=replay.tick_rate)
+                self.world.profiler = profiler
+                self.new_game(replay.seed)
+                self.recorder = None
+                self.replay = iter(replay)
+
         #This function allows the collected thunderbolts in the bottom left corner of the screen
-        #to be tapped, whereupon the enemy bees get pacified for an amount of time. 
+        #to be tapped, whereupon the enemy bees get pacified for an amount of time. Only the bolt 
+        #tapped is released: As the others move up in its place, the next one lies under the finger. 
         def touch_began(self, touch):
+                if self.replay is not None:
+                        return
                 p = touch.location
 
                 for T in self.thunderbolts:
                         if p in T.frame:
-                                self.release_thunder()
-                                T.run_action(Action.fade_to(0, 0.1))
-                                self.thunderbolts.remove(T)     
-                                self.sort_thunderbolts()
-        
-        #Primitve method for moving the player. Not used in this version of the game. 
-        #The updated method is shown below. 
-        def update_player(self):
-                g = gravity()
-                x = self.player.position.x
-                y = self.player.position.y
-                max_speed = 40
-
-                if abs(g.x) > 0.05:
-                        x = x + g.x * max_speed
-
-                if abs(g.y) > 0.05:
-                        y = y + g.y * max_speed
-
-                x = max(0, min(self.size.w, x + randint(-1, 1)))
-                y = max(0, min(self.size.h, y + randint(-1, 1)))
-                self.player.position = (x, y)
-        
-        #The updated method for moving the player with the help of the iPhone's
-        #built-in gyroscope and accelerometer. By using the set_position method, 
-        #the player can be moved conveniently irrespective of the inital positioning 
-        #of the phone. There is a max speed applying horizontally and vertically and 
-        #the player cannot move out of the bounds of the screen. 
-        def update_player2(self):
-                if not self.player.half_dead:
-                        g = gravity()
-                        x = self.player.position.x
-                        y = self.player.position.y
-                        max_speed = 10
-
-                        u = (g.x - self.gx) / self.factor_x
-                        v = (g.y - self.gy) / self.factor_y
-
-                        if abs(u) > 0.05:
-                                if abs(u) < 1:
-                                        x = x + u * max_speed
-                                else: 
-                                        x = x + (u / abs(u)) * max_speed
-
-                        if abs(v) > 0.05:
-                                if abs(v) < 1:
-                                        y = y + v * max_speed
-                                else:
-                                        y = y + (v / abs(v)) * max_speed
-
-                        x = max(0, min(self.size.w, x + randint(-1, 1)))
-                        y = max(0, min(self.size.h, y + randint(-1, 1)))
-                        self.player.position = (x, y)
-
-        #This method makes sure the game can be played irrespective of the 
-        #position of the phone when starting a new game, i.e. the starting 
-        #position of the phone is seen as the neutral position where the 
-        #player is not moving. 
-        def set_position(self):
-                if self.time == 0:
-                        g = gravity()
-                        self.gx = g.x
-                        self.gy = g.y
-                        self.factor_x = min(1 - self.gx, 1 + self.gx)
-                        self.factor_y = min(1 - self.gy, 1 + self.gy)
-
-        def double_size(self, node, progress):
-                node.size *= 2
-
-        def double_player_size(self):
-                self.player.change_size(2)
-                self.update_player_size()
-
-        def halve_player_size(self):
-                self.player.change_size(0.5)
-                self.update_player_size()
-        
-        #Relates the age and fully_grown attributes. This is used for the Player's 
-        #die method, to keep track of the size of the player as it dies. 
-        def update_player_size(self):
-                self.player.age = 10 * self.player.diameter
-                self.player.fully_grown = self.player.age
+                                self.release_thunder(T)
+                                break
+
+        def release_thunder(self, T):
+                if self.world.release_thunder():
+                        if self.recorder:
+                                self.recorder.release_thunder()
+                        T.run_action(Action.sequence([Action.fade_to(0, 0.1), self.thunderbolt_pool.recycle(T)]))
+                        self.thunderbolts.remove(T)     
+                        self.sort_thunderbolts()
 
+        def update_labels(self):
+                self.score_label.text = str(self.world.score)
+                self.lives_label.text = str(self.world.lives)
 
         def load_highscore(self):
                 try:
@@ -646,273 +517,111 @@ class Game (Scene):
                 except:
                         self.highscore = 0
 
+        #The high score is written at the end of the game, or within a few seconds of being beaten. 
         def save_highscore(self):
-                with open('.beehive_highscore', 'w') as f:
-                        f.write(str(self.highscore))
+                self.writer.write('.beehive_highscore', str(self.highscore))
 
-        def check_lives(self):
-                if self.player.dead:
-                        self.player.remove_from_parent()
-                        self.game_over()
-        
-        #Creates a new bee. How often this happens (in seconds) is controlled by BEEFREQUENCY.  
-        #The self.beebirth boolean is used to make sure that only one bee (and not ~60) is created
-        #each time (self.t changes only once in 60 update cycles). 
-        def spawn_bee(self):
-                t = int(self.t) % BEEFREQUENCY
-                if t == 1 and self.beebirth:
-                        bee = Bee(parent=self)
-                        r = random.choice([50, self.size.w - 50])
-                        s = random.choice([50, self.size.h - 50])
-                        bee.position = (r, s)
-                        self.bees.append(bee)
-                        self.beebirth = False
-                elif t == 2:
-                        self.beebirth = True
-        
-        #Controls the forming of a flower power-up. The self.flowerbirth attribute 
-        #sees to that one flower forms in every time window of FLOWERFREQENCY seconds, 
-        #and that there is a random element to when the flower forms in this time span. 
-        def grow_flower(self):
-                t = int(self.t) % FLOWERFREQUENCY
-                if t == 0:
-                        self.flowergrowth = True
-                        self.flowerbirth = random.randint(1, FLOWERFREQUENCY)
-                        self.flowercounter = random.randint(1, 4)
-                if t == self.flowerbirth and self.flowergrowth: 
-                        self.flowergrowth = False
-                        if self.flowercounter == 1:
-                                flower = Flower(parent=self, farbe='rot')
-                                r = random.randint(50, self.size.w - 50)
-                                s = random.randint(50, self.size.h - 50)
-                                flower.position = (r, s)
-                                flower.birthtime = self.t
-                                self.flowers.append(flower)
-                        else: 
-                                flower = Flower(parent=self, farbe='white')
-                                r = random.randint(50, self.size.w - 50)
-                                s = random.randint(50, self.size.h - 50)
-                                flower.position = (r, s)
-                                flower.birthtime = self.t
-                                self.flowers.append(flower)
-        
-        #Controls the forming of a honeycomb. The self.honeycombbirth attribute 
-        #sees to that one honeycomb forms in every time window of HONEYCOMBFREQENCY seconds, 
-        #and that there is a random element to when the honeycomb forms in this time span.
-        def grow_honeycomb(self):
-                t = int(self.t) % HONEYCOMBFREQUENCY
-                if t == 0:
-                        self.honeycombgrowth = True
-                        self.honeycombbirth = random.randint(1, HONEYCOMBFREQUENCY)
-                if t == self.honeycombbirth and self.honeycombgrowth:
-                        honeycomb = Honeycomb(parent=self)
-                        r = random.randint(50, self.size.w - 50)
-                        s = random.randint(50, self.size.h - 50)
-                        honeycomb.position = (r, s)
-                        honeycomb.birthtime = self.t
-                        self.honeycombs.append(honeycomb)
-                        self.honeycombgrowth = False
-
-        #Controls the forming of a heart power-up. The self.heartbirth attribute 
-        #sees to that one heart forms in every time window of HEARTFREQENCY seconds, 
-        #and that there is a random element to when the heart forms in this time span.                        
-        def grow_heart(self):
-                t = int(self.t) % HEARTFREQUENCY
-                if t == 0:
-                        self.heartgrowth = True
-                        self.heartbirth = random.randint(1, HEARTFREQUENCY)
-                if t == self.heartbirth and self.heartgrowth:
-                        heart = Heart(parent=self)
-                        r = random.randint(50, self.size.w - 50)
-                        s = random.randint(50, self.size.h - 50)
-                        heart.position = (r, s)
-                        heart.birthtime = self.t
-                        self.hearts.append(heart)
-                        self.heartgrowth = False
-
-        #Controls the forming of a lightning power-up. The self.lightningbirth attribute 
-        #sees to that one lightning forms in every time window of LIGHTNINGFREQENCY seconds, 
-        #and that there is a random element to when the lightning forms in this time span.
-        def grow_lightning(self):
-                t = int(self.t) % LIGHTNINGFREQUENCY
-                if t == 0:
-                        self.lightninggrowth = True
-                        self.lightningbirth = random.randint(1, LIGHTNINGFREQUENCY)
-                if t == self.lightningbirth and self.lightninggrowth:
-                        lightning = Lightning(parent=self)
-                        r = random.randint(50, self.size.w - 50)
-                        s = random.randint(50, self.size.h - 50)
-                        lightning.position = (r, s)
-                        lightning.birthtime = self.t
-                        self.lightnings.append(lightning)
-                        self.lightninggrowth = False
-
-        #Controls the forming of a mushroom power-up. The self.mushroombirth attribute 
-        #sees to that one mushroom forms in every time window of MUSHROOMFREQENCY seconds, 
-        #and that there is a random element to when the mushroom forms in this time span.
-        def grow_mushroom(self):
-                t = int(self.t) % MUSHROOMFREQUENCY
-                if t == 0:
-                        self.mushroomgrowth = True
-                        self.mushroombirth = random.randint(1, MUSHROOMFREQUENCY)
-                if t == self.mushroombirth and self.mushroomgrowth:
-                        mushroom = Mushroom(parent=self)
-                        r = random.randint(50, self.size.w - 50)
-                        s = random.randint(50, self.size.h - 50)
-                        mushroom.position = (r, s)
-                        mushroom.birthtime = self.t
-                        self.mushrooms.append(mushroom)
-                        self.mushroomgrowth = False
-        
-        #The enemy bees fly at increased speed for five seconds when provoked. 
-        def check_buzz(self):
-                if self.buzzing and self.t - self.time_last_buzz > 5:
-                        self.speed_limit = 3
-                        self.buzzing = False
-        
-        #The enemy bees are pacified for 7 seconds when hit by lightning. 
-        def check_thunder(self):
-                if self.thunder and self.t - self.time_last_thunder > 7:
-                        self.speed_limit = 3
-                        self.thunder = False
-        
-        #When the player is immune, he is not harmed by the enemy bees. 
-        def change_immunity(self):
-                if self.player.immune:
-                        self.player.immune = False
-                else:
-                        self.player.immune = True               
-        
-        #When the player is in attack mode, it can kill off the enemy bees. 
-        def change_attack(self):
-                if self.player.attack:
-                        self.player.attack = False
-                else:
-                        self.player.attack = True       
+        def on_bee_spawned(self, bee):
+                node = self.bee_pool.get(self)
+                node.sync(bee)
+                self.bees[bee] = node
         
-        #This method controls whether the player has collided with any of the enemy bees. If this is the case, and the player
-        #is not immune or in attack mode, nor dying, and the enemy bee is also not dying, then the player loses a life and 
-        #the enemy bees get stirred and so move faster for a limited period of time. 
-        def bee_collision(self, bnode):
-                v1 = Vector2(self.player.position.x, self.player.position.y)
-                v2 = Vector2(bnode.position.x, bnode.position.y)
-
-                if abs(v1 - v2) < 0.5 * (self.player.size.x + bnode.size.x) and not self.player.immune and not self.player.attack and not bnode.dying: 
-                        if self.lives > 0:
-                                self.lives -= 1
-                                self.lives_label.text = str(self.lives)
-                                if self.lives > 0:
-                                        self.speed_limit = 10
-                                        self.buzzing = True
-                                        self.time_last_buzz = self.t
-                                        self.player.immune = True
-                                        sound.play_effect('digital:LowDown')
-
-                                        actions = [Action.fade_to(0.1, 0.5), Action.fade_to(1, 0.5), Action.fade_to(0.1, 1), Action.fade_to(1, 0.5), Action.fade_to(0.1, 0.5), Action.fade_to(1, 0.5), Action.call(self.change_immunity)]               
-                                        self.player.run_action(Action.sequence(actions))
-                                if self.lives == 0:
-                                        sound.play_effect('arcade:Jump_1')
-                                        self.player.dying = True
+        #The enemy bees have been hit by the player in attack mode, and go into a tail spin. 
+        def on_bees_killed(self, bees):
+                self.play_sound(SOUNDS['bees_killed'])
         
-        #This method controls whether the player has collided with any of the enemy bees. If this is the case, and the player
-        #is in attack mode (and if the enemy bee in question has fully entered the hive, and is not dying), then the enemy bee dies.  
-        def bee_collision2(self, bnode):
-                v1 = Vector2(self.player.position.x, self.player.position.y)
-                v2 = Vector2(bnode.position.x, bnode.position.y)                        
-
-                if abs(v1 - v2) < 0.5 * (self.player.size.x + bnode.size.x) and bnode.inHive and self.player.attack and not bnode.dying: 
-                        sound.play_effect('arcade:Laser_2')
-                        bnode.dying = True
+        def on_bees_dead(self, bees):
+                self.dead += bees
+
+        #Lets the bees that have hit the floor of the hive during the frame turn into dust, all 
+        #at once: A single sound is played, and the particles of the quality tier are shared out 
+        #among the dust clouds so that the frame uses no more than the budget of the emitter. 
+        def bury(self):
+                if not self.dead:
+                        return
+                self.play_sound(SOUNDS['bees_dead'])
+                particles = min(self.governor.tier.dust, self.emitter.budget // len(self.dead))
+                for bee in self.dead:
+                        node = self.bees.pop(bee)
+                        self.emitter.cloud(node.position.x, node.position.y, particles)
+                        node.die(self.bee_pool)
+                self.dead = []
         
-        #Controls if the player has collided with a flower power-up. In this case, the attack mode is initiated, the 
-        #consequences of which depend on if the flower was white or red. 
-        def flower_collision(self, flower):
-                v1 = Vector2(self.player.position.x, self.player.position.y)
-                v2 = Vector2(flower.position.x, flower.position.y)                      
-
-                if abs(v1 - v2) < 0.5 * (self.player.size.x + flower.size.x): 
-                        flower.run_action(Action.fade_to(0, 0.1))
-                        flower.birthtime = -10
-                        sound.play_effect('arcade:Powerup_1')
-                        self.player.attack = True
-
-                        if flower.farbe == 'white':
-                                actions = [Action.fade_to(0.1, 0.5), Action.fade_to(1, 0.5), Action.fade_to(0.1, 1), Action.fade_to(1, 0.5), Action.fade_to(0.1, 0.5), Action.fade_to(1, 0.5), Action.fade_to(0.1, 0.5), Action.fade_to(1, 0.5), Action.fade_to(0.1, 1), Action.fade_to(1, 0.5), Action.fade_to(0.1, 0.5), Action.fade_to(1, 0.5), Action.call(self.change_attack)]     
-                        elif flower.farbe == 'rot':
-                                actions = [Action.call(self.double_player_size), Action.fade_to(0.1, 0.5), Action.fade_to(1, 0.5), Action.fade_to(0.1, 1), Action.fade_to(1, 0.5), Action.fade_to(0.1, 0.5), Action.fade_to(1, 0.5), Action.fade_to(0.1, 0.5), Action.fade_to(1, 0.5), Action.fade_to(0.1, 1), Action.fade_to(1, 0.5), Action.fade_to(0.1, 0.5), Action.fade_to(1, 0.5), Action.call(self.halve_player_size), Action.call(self.change_attack)]
-
-                        self.player.child.run_action(Action.sequence(actions))
-
-        #Checks if the player has collided with a honeycomb. In this case, the score is being updated. 
-        #For every second honeycomb collected, the player grows in size. 
-        def honeycomb_collision(self, honeycomb):
-                v1 = Vector2(self.player.position.x, self.player.position.y)
-                v2 = Vector2(honeycomb.position.x, honeycomb.position.y)                        
-
-                if abs(v1 - v2) < 0.5 * (self.player.size.x + honeycomb.size.x): 
-                        honeycomb.run_action(Action.fade_to(0, 0.1))
-                        honeycomb.birthtime = -10 
-                        self.player.honeycombscollected += 1
-                        self.score += 1
-                        self.score_label.text = str(self.score)
-                        x = self.score % 2
-                        if x == 0:
-                                r = self.player.position.x
-                                s = self.player.position.y
-                                self.player.diameter += 2
-                                self.update_player_size()
-                                X = self.player.diameter
-                                Y = X / 2
-                                self.player.path = ui.Path.oval(r, s, X, X)
-                                self.player.child.path = ui.Path.oval(r, s, Y, Y)
-
-                        sound.play_effect('arcade:Coin_4')
-                        if self.score > self.highscore:
-                                self.highscore = self.score
-                                self.save_highscore()
+        #The player has lost a life and is immune for a while, indicated by the player blinking 
+        #(see Player.show_effects). 
+        def on_player_hit(self, player):
+                self.update_labels()
+                self.play_sound(SOUNDS['player_hit'])
+
+        def on_player_dying(self, player):
+                self.update_labels()
+                self.play_sound(SOUNDS['player_dying'])
+
+        def on_player_half_dead(self, player):
+                self.play_sound(SOUNDS['player_half_dead'])
+                self.emitter.cloud(self.player.position.x, self.player.position.y, self.governor.tier.dust)
+                self.player.die()
+
+        #The snapshot of the game, and the game in the score history, are only written for a game 
+        #that has actually been played, and not for the replay of one. 
+        def on_game_over(self, player):
+                self.player.remove_from_parent()
+                played = self.replay is None
+                if played:
+                        self.writer.write(SNAPSHOT, None)
+                if self.recorder:
+                        self.writer.write(LAST_REPLAY, bytes(self.recorder.data))
+                        self.last_replay = Replay(self.recorder.data)
+                        self.recorder = None
+                if PROFILE:
+                        self.writer.write('.beehive_profile.json', self.profiler.dumps())
+                self.writer.flush()
+
+                w = self.world
+                if played:
+                        self.history.record(w.score, w.t, w.bees_killed, w.pickups_collected, w.lives_lost, w.seed)
+                self.game_over()
+
+        #Returns the pool of the nodes for the given kind of pickup. The flowers have one pool 
+        #for each colour. 
+        def pickup_pool(self, kind, farbe=None):
+                key = (kind, farbe)
+                pool = self.pickup_pools.get(key)
+                if pool is None:
+                        if kind == FLOWER:
+                                pool = NodePool(lambda: Flower(farbe=farbe))
+                        else:
+                                pool = NodePool(sprite_factory(kind))
+                        self.pickup_pools[key] = pool
+                return pool
+
+        def on_pickup_spawned(self, pickup):
+                node = self.pickup_pool(pickup.kind, pickup.farbe).get(self)
+                node.position = (pickup.x, pickup.y)
+                self.pickups[pickup] = node
+
+        def on_pickup_expired(self, pickup):
+                node = self.pickups.pop(pickup)
+                node.run_action(Action.sequence([Action.fade_to(0, 0.1), self.pickup_pool(pickup.kind, pickup.farbe).recycle(node)]))
         
-        #Checks if the player has collided with a heart power-up. In this case, the number of lives
-        #is increased by one. 
-        def heart_collision(self, heart):
-                v1 = Vector2(self.player.position.x, self.player.position.y)
-                v2 = Vector2(heart.position.x, heart.position.y)                        
-
-                if abs(v1 - v2) < 0.5 * (self.player.size.x + heart.size.x): 
-                        heart.run_action(Action.fade_to(0, 0.1))
-                        heart.birthtime = -10 
-                        self.lives += 1
-                        self.lives_label.text = str(self.lives)
-                        sound.play_effect('arcade:Powerup_3')
-
-        #Checks if the player has collided with a lightning power-up. If this is the case, 
-        #a thunderbolt is added in the bottom left corner. This can then be tapped to 
-        #release thunder that pacifies the enemy bees. 
-        def lightning_collision(self, lightning):
-                v1 = Vector2(self.player.position.x, self.player.position.y)
-                v2 = Vector2(lightning.position.x, lightning.position.y)                        
-
-                if abs(v1 - v2) < 0.5 * (self.player.size.x + lightning.size.x): 
-                        lightning.run_action(Action.fade_to(0, 0.1))
-                        sound.play_effect('arcade:Powerup_2')   
-                        lightning.birthtime = -10 
-
-                        thunderbolt = Thunderbolt(parent=self)
-                        #thunderbolt.position = (100, 100)
+        #The effect of a collected pickup has already been applied to the world. What is left is 
+        #to show it: A lightning is added as a thunderbolt in the bottom left corner, and the high 
+        #score is saved as it is beaten. The attack mode of a flower is shown by Player.show_effects. 
+        def on_pickup_collected(self, pickup):
+                self.on_pickup_expired(pickup)
+                self.play_sound(PICKUP_SOUNDS[pickup.kind])
+                self.update_labels()
+                
+                if pickup.kind == LIGHTNING:
+                        thunderbolt = self.thunderbolt_pool.get(self)
                         self.thunderbolts.append(thunderbolt)
                         self.sort_thunderbolts()
-        
-        #Checks if the player has collided with a mushroom power-up. If this is the case, 
-        #the player halves in size. 
-        def mushroom_collision(self, mushroom):
-                v1 = Vector2(self.player.position.x, self.player.position.y)
-                v2 = Vector2(mushroom.position.x, mushroom.position.y)                  
-
-                if abs(v1 - v2) < 0.5 * (self.player.size.x + mushroom.size.x): 
-                        mushroom.run_action(Action.fade_to(0, 0.1))
-                        mushroom.birthtime = -10 
-                        sound.play_effect('arcade:Jump_1')
-                        self.halve_player_size()
-                        self.update_player_size()
+                elif pickup.kind == HONEYCOMB and self.world.score > self.highscore:
+                        self.highscore = self.world.score
+                        self.save_highscore()
+
+        def on_thunder_released(self, entity):
+                self.play_sound(SOUNDS['thunder_released'])
 
         #Realings the positions of the thunderbolts in the bottom left corner as one 
         #has been used. 
@@ -920,31 +629,67 @@ class Game (Scene):
                 for T in self.thunderbolts:
                         T.position = (20 + self.thunderbolts.index(T) * 30, 20)
 
-        #When the thunder is released, the enemy bees are pacified, int that their max speed
-        #goes down. 
-        def release_thunder(self):
-                        self.speed_limit = 0.5
-                        self.thunder = True
-                        self.time_last_thunder = self.t
-                        sound.play_effect('arcade:Powerup_2')                                                           
-
+        #Called as the app goes to the background, and as the scene is closed. The game in progress 
+        #is saved, in case the app is not brought back. 
+        def pause(self):
+                if not self.paused and not self.world.over and self.replay is None:
+                        self.autosave()
+                self.writer.flush()
+
+        def stop(self):
+                self.tilt.stop()
+                self.mixer.close()
+                self.writer.close(timeout=1)
+                self.history.close()
+
+        #The start menu shows the high score and the number of games played, both read from the 
+        #summary of the score history. If an unfinished game has been saved, it can be continued. 
         def show_start_menu(self):
                 self.paused = True
-                self.menu = MenuScene('Beehive', 'Highscore: %i' % self.highscore, ['New Game'])
+                summary = self.history.summary
+                self.highscore = max(self.highscore, summary['best'])
+                self.saved = self.load_snapshot()
+                buttons = ['Continue', 'New Game'] if self.saved else ['New Game']
+                if self.last_replay:
+                        buttons.append('Replay')
+                self.menu = MenuScene('Beehive', 'Highscore: %i   Games: %i' % (self.highscore, summary['games']), buttons)
                 self.present_modal_scene(self.menu)
 
         def game_over(self):
                 self.paused = True
-                self.menu = MenuScene('Game Over', 'Score: %i' % self.score, ['New Game'])
+                buttons = ['New Game', 'Replay'] if self.last_replay else ['New Game']
+                self.menu = MenuScene('Game Over', 'Score: %i' % self.world.score, buttons)
                 self.present_modal_scene(self.menu)
 
         def menu_button_selected(self, title):
-                if title in ('Continue', 'New Game'):
+                if title in ('Continue', 'New Game', 'Replay'):
                         self.dismiss_modal_scene()
                         self.menu = None
                         self.paused = False
                 if title == 'New Game':
                         self.new_game()
+                elif title == 'Continue' and self.saved:
+                        self.resume(self.saved)
+                elif title == 'Replay' and self.last_replay:
+                        self.play_replay(self.last_replay)
+                self.saved = None
+
+        #Returns the snapshot of the unfinished game, or None. 
+        def load_snapshot(self):
+                try:
+                        with open(SNAPSHOT, 'rb') as f:
+                                data = f.read()
+                        snapshot.loads(data)
+                except Exception:
+                        return None
+                return data
+
+        #Returns the replay of the last game played, or None. 
+        def load_replay(self):
+                try:
+                        return Replay.load(LAST_REPLAY)
+                except Exception:
+                        return None
 
 
 if __name__ == '__main__':
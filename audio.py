@@ -0,0 +1,75 @@
+"""
+Playing the sound effects of the game.
+
+A mass kill during the attack mode can ask for dozens of sound effects within a single
+frame. Rather than calling sound.play_effect for each of them, the Mixer below collects
+the effects asked for during a frame, playing each effect only once per frame, and hands
+them to a thread of its own as the frame ends (flush), so the update loop never waits for
+the audio system. At most max_voices effects are playing at any time: Each effect is
+counted as playing for voice_time seconds, and the oldest effect is stopped to make room
+for a new one.
+
+All effects are loaded by the same thread as the mixer is created, before anything is
+played, so the first time an effect is played does not hold up a frame either.
+"""
+
+from collections import deque
+import queue
+import threading
+import time
+import sound
+
+class Mixer (object):
+        def __init__(self, effects=(), max_voices=6, voice_time=0.5):
+                self.max_voices = max_voices
+                self.voice_time = voice_time
+                self.frame = [] #The effects asked for during the current frame, in order
+                self.voices = deque() #The (start time, effect id) of the effects playing
+                self.queue = queue.Queue()
+                self.played = 0
+                self.dropped = 0
+                self.thread = threading.Thread(target=self.run, args=(list(effects),), name='Mixer')
+                self.thread.daemon = True
+                self.thread.start()
+
+        #Asks for the effect to be played as the current frame ends.
+        def play(self, name):
+                if name not in self.frame:
+                        self.frame.append(name)
+                else:
+                        self.dropped += 1
+
+        #Hands the effects of the current frame to the thread of the mixer.
+        def flush(self):
+                if self.frame:
+                        self.queue.put(self.frame)
+                        self.frame = []
+
+        def close(self):
+                self.queue.put(None)
+
+        def run(self, effects):
+                for name in effects:
+                        try:
+                                sound.load_effect(name)
+                        except Exception:
+                                pass
+
+                while True:
+                        names = self.queue.get()
+                        if names is None:
+                                break
+                        for name in names[:self.max_voices]:
+                                self.start(name)
+                        self.dropped += max(0, len(names) - self.max_voices)
+
+        #Plays an effect, stopping the oldest effect still playing if all voices are taken.
+        def start(self, name):
+                now = time.perf_counter()
+                voices = self.voices
+                while voices and now - voices[0][0] > self.voice_time:
+                        voices.popleft()
+                if len(voices) >= self.max_voices:
+                        sound.stop_effect(voices.popleft()[1])
+                voices.append((now, sound.play_effect(name)))
+                self.played += 1
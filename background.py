@@ -0,0 +1,87 @@
+"""
+The hexagonal background pattern of the hive.
+
+The pattern consists of several hundred circles. Rather than keeping a ShapeNode for
+each of them in the scene, the circles are drawn once into an image, which is cached
+on disk and shown as a single SpriteNode. The cache is keyed by the size of the
+screen and the number of cells, so the pattern is only drawn the first time the game
+is started on a device. Should the image not be available for any reason, the
+background falls back to the grid of nodes.
+"""
+
+from scene import *
+import math
+import os
+import ui
+
+WALL_COLOR = '#c17c00'
+CACHE_DIR = '.beehive_cache'
+
+#Returns the radius of the circles, and the positions of their centres, for a pattern
+#with m columns filling a screen of the given size.
+def hex_cells(w, h, m=17):
+        k = (m-1) * 2 * math.sqrt(3) + 2
+        r = w / k
+        s = int(h / (2 * r))
+        centres = []
+
+        for i in range(m):
+                for j in range(s + 1):
+                        centres.append((r + 2 * math.sqrt(3) * r * i, r + 2 * r * j))
+
+        for i in range(m + 1):
+                for j in range(s + 2):
+                        centres.append((r - math.sqrt(3) * r + 2 * math.sqrt(3) * r * i, 2 * r * j))
+
+        return r, centres
+
+def cache_path(w, h, m):
+        return os.path.join(CACHE_DIR, 'wall_%ix%i_%i_%gx.png' % (w, h, m, get_screen_scale()))
+
+#Draws the pattern into an image of the given size. The y-axis of the image points
+#downwards, as opposed to the y-axis of the scene.
+def render_wall(w, h, m):
+        r, centres = hex_cells(w, h, m)
+        with ui.ImageContext(w, h) as ctx:
+                ui.set_color(WALL_COLOR)
+                for x, y in centres:
+                        ui.Path.oval(x - r, h - y - r, 2 * r, 2 * r).fill()
+                return ctx.get_image()
+
+#Returns the texture of the pattern, drawing it and writing it to the cache if it
+#has not been drawn before.
+def wall_texture(w, h, m):
+        path = cache_path(w, h, m)
+        if not os.path.exists(path):
+                image = render_wall(w, h, m)
+                if not os.path.isdir(CACHE_DIR):
+                        os.makedirs(CACHE_DIR)
+                with open(path + '.tmp', 'wb') as f:
+                        f.write(image.to_png())
+                os.replace(path + '.tmp', path)
+        return Texture(ui.Image.named(path))
+
+#The pattern as one ShapeNode per circle.
+def wall_nodes(parent, w, h, m):
+        r, centres = hex_cells(w, h, m)
+        wall = Node(parent=parent)
+
+        for x, y in centres:
+                face = ShapeNode(ui.Path.oval(0, 0, 2 * r, 2 * r), WALL_COLOR)
+                wall.add_child(face)
+                face.position = (x, y)
+
+        return wall
+
+#Adds the background pattern to the scene, as a single sprite if possible.
+def add_wall(parent, m=17, prerendered=True):
+        w = parent.size.w
+        h = parent.size.h
+        if prerendered:
+                try:
+                        texture = wall_texture(w, h, m)
+                except Exception:
+                        pass
+                else:
+                        return SpriteNode(texture, parent=parent, anchor_point=(0, 0), position=(0, 0), size=(w, h))
+        return wall_nodes(parent, w, h, m)
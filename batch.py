@@ -0,0 +1,122 @@
+"""
+Simulating many games at once, to tune the difficulty of the game.
+
+Every combination of the parameter values given on the command line (a grid point)
+is played by a controller (see controllers.py) for a number of seeds, with the games spread over a
+pool of processes. The same seeds are used for every grid point, so the differences
+between the grid points are not blurred by the luck of the draw. For each grid point,
+the distributions of the score and of the time survived are printed (and can be
+written as JSON):
+
+        python batch.py --games 1000 --grid bee_frequency=3,4,5 --grid player_lives=3,5
+
+The names of the parameters are the fields of simulation.Parameters. Each game ends
+as the player runs out of lives, or after --minutes minutes of game time.
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import time
+from collections import OrderedDict
+from controllers import CONTROLLERS
+from simulation import World, Parameters, DEFAULTS
+
+WIDTH = 375
+HEIGHT = 667
+
+#Plays a single game and returns its results. The task is a (params, seed, minutes,
+#tick_rate, controller) tuple, so that it can be handed to a process of the pool.
+def play(task):
+        params, seed, minutes, tick_rate, controller = task
+        world = World(WIDTH, HEIGHT, seed=seed, tick_rate=tick_rate, params=params)
+        player = CONTROLLERS[controller]()
+        player.reset(world)
+        dt = 1 / tick_rate
+        end = 60 * minutes
+        while not world.over and world.t < end:
+                u, v, thunder = player.control(world)
+                if thunder:
+                        world.release_thunder()
+                world.advance(dt, u, v)
+        return {
+                'params': params,
+                'seed': seed,
+                'score': world.score,
+                'seconds': world.t,
+                'survived': not world.over,
+                'bees_killed': world.bees_killed,
+                'pickups_collected': world.pickups_collected,
+        }
+
+#Returns the Parameters of every combination of the values in the grid, which maps the
+#names of parameters to lists of values.
+def grid_points(grid):
+        names = list(grid)
+        return [DEFAULTS._replace(**dict(zip(names, values))) for values in itertools.product(*(grid[name] for name in names))]
+
+def quantiles(values, ps=(0.1, 0.25, 0.5, 0.75, 0.9)):
+        ordered = sorted(values)
+        n = len(ordered)
+        result = OrderedDict((('mean', sum(ordered) / n),))
+        for p in ps:
+                result['p%i' % (100 * p)] = ordered[min(n - 1, int(p * n))]
+        return result
+
+#Plays the given number of games at every grid point in a pool of processes, and returns
+#the distributions of the results of each grid point.
+def run(grid, games, minutes=10, tick_rate=30, controller='planner', processes=None, chunksize=4):
+        points = grid_points(grid)
+        tasks = [(params, seed, minutes, tick_rate, controller) for params in points for seed in range(games)]
+        results = OrderedDict((params, []) for params in points)
+        with multiprocessing.Pool(processes) as pool:
+                for result in pool.imap_unordered(play, tasks, chunksize):
+                        results[result['params']].append(result)
+
+        summary = []
+        for params, games in results.items():
+                summary.append({
+                        'params': params._asdict(),
+                        'games': len(games),
+                        'score': quantiles([g['score'] for g in games]),
+                        'seconds': quantiles([g['seconds'] for g in games]),
+                        'survived': sum(g['survived'] for g in games) / len(games),
+                })
+        return summary
+
+#Parses a 'name=value,value,...' grid argument.
+def parse_grid(arg):
+        name, values = arg.split('=', 1)
+        if name not in Parameters._fields:
+                raise argparse.ArgumentTypeError('unknown parameter %r, expected one of %s' % (name, ', '.join(Parameters._fields)))
+        return name, [int(v) for v in values.split(',')]
+
+def main(argv=None):
+        parser = argparse.ArgumentParser(description='Plays many BeeHive games to tune the parameters of the game.')
+        parser.add_argument('--grid', type=parse_grid, action='append', default=[], help='the values of a parameter, as name=value,value,...')
+        parser.add_argument('--games', type=int, default=100, help='the number of games played at each grid point')
+        parser.add_argument('--minutes', type=float, default=10, help='the longest game in minutes of game time')
+        parser.add_argument('--tick-rate', type=int, default=30, help='the tick rate of the simulated worlds')
+        parser.add_argument('--player', choices=sorted(CONTROLLERS), default='planner', help='the controller playing the games')
+        parser.add_argument('--processes', type=int, help='the number of processes (default: one per core)')
+        parser.add_argument('--json', help='writes the results to this file')
+        args = parser.parse_args(argv)
+
+        start = time.perf_counter()
+        summary = run(OrderedDict(args.grid), args.games, args.minutes, args.tick_rate, args.player, args.processes)
+        names = [name for name, values in args.grid]
+        for point in summary:
+                setting = ' '.join('%s=%s' % (name, point['params'][name]) for name in names) or 'defaults'
+                s = point['score']
+                t = point['seconds']
+                print('%-40s score %5.1f (p10 %3i p50 %3i p90 %3i)  seconds %6.1f (p10 %5.0f p50 %5.0f p90 %5.0f)  survived %3.0f%%' % (
+                        setting, s['mean'], s['p10'], s['p50'], s['p90'], t['mean'], t['p10'], t['p50'], t['p90'], 100 * point['survived']))
+        print('%i games in %.1f s' % (len(summary) * args.games, time.perf_counter() - start))
+
+        if args.json:
+                with open(args.json, 'w') as f:
+                        json.dump(summary, f, indent=1)
+
+if __name__ == '__main__':
+        main()
@@ -0,0 +1,216 @@
+"""
+Benchmarks of the game loop, run headless with the stand-ins for Pythonista's scene,
+ui and sound modules found in benchmarks/stubs.
+
+Each scenario prepares a new game with a fixed seed and then calls Game.update once
+per frame with a scripted tilt of the phone, timing every call. The results (frames
+per second, percentiles of the frame time and the peak memory traced during a second
+run of the scenario) are printed, and can be written as JSON and compared with the
+results of an earlier commit:
+
+        python benchmarks/bench.py --json before.json
+        python benchmarks/bench.py --compare before.json
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path[:0] = [os.path.join(HERE, 'stubs'), ROOT]
+
+import BeeHive
+from simulation import Pickup, FLOWER
+from tilt import TiltInput, SyntheticSource
+
+FPS = 60
+SEED = 1234
+
+#The tilt of the phone at the given time. The player circles slowly around the hive.
+def tilt(t):
+        i = t * FPS
+        return 0.4 * math.sin(i / 70), 0.4 * math.sin(i / 110)
+
+#Adds fully grown bees to the world, scattered around the given point.
+def add_bees(game, n, x=None, y=None, spread=None):
+        world = game.world
+        for i in range(n):
+                if spread is None:
+                        bx = world.random.uniform(0, world.width)
+                        by = world.random.uniform(0, world.height)
+                else:
+                        bx = x + world.random.uniform(-spread, spread)
+                        by = y + world.random.uniform(-spread, spread)
+                fully_grown = world.random.randint(150, 250)
+                bee = world.swarm.spawn(bx, by, fully_grown)
+                bee.age = fully_grown
+                bee.inHive = True
+                world.emit('bee_spawned', bee)
+
+#Keeps the player alive for the whole scenario.
+def invulnerable(game):
+        game.world.lives = 10 ** 6
+
+def early_game(game):
+        pass
+
+def bees_buzzing(game):
+        invulnerable(game)
+        add_bees(game, 200)
+        world = game.world
+        world.speed_limit = 10
+        world.buzzing = True
+        world.time_last_buzz = float('inf')
+
+def thunder_active(game):
+        invulnerable(game)
+        add_bees(game, 200)
+        game.world.thunderbolts = 3
+
+#The player picks up a red flower in the middle of a crowd of bees.
+def mass_die_off(game):
+        invulnerable(game)
+        world = game.world
+        p = world.player
+        add_bees(game, 300, p.x, p.y, 80)
+        world.put_pickup(Pickup(FLOWER, p.x, p.y, 0, 'rot'))
+
+def long_session(game):
+        invulnerable(game)
+
+#The name of each scenario, the function preparing it and its length in seconds.
+SCENARIOS = [
+        ('early game', early_game, 60),
+        ('200 bees buzzing', bees_buzzing, 20),
+        ('thunder active', thunder_active, 20),
+        ('mass die-off after red flower', mass_die_off, 10),
+        ('long 30-minute session', long_session, 30 * 60),
+]
+
+#Runs a scenario and returns the time of each frame in seconds. The threads and the database
+#of the game are closed after the run, so that they do not carry over into the next one.
+def run_scenario(setup, frames, swarm=None):
+        game = BeeHive.Game()
+        game.setup()
+        try:
+                if swarm is not None:
+                        game.world = BeeHive.World(game.size.w, game.size.h, swarm=swarm)
+                game.paused = False
+                game.new_game(SEED)
+                game.dt = 1 / FPS
+                setup(game)
+
+                #The tilt is sampled once per frame, rather than by the thread of the TiltInput, so that
+                #every run plays out the same way.
+                game.tilt.stop()
+                game.tilt = TiltInput(SyntheticSource(tilt), calibration=1)
+
+                times = []
+                clock = time.perf_counter
+                for i in range(frames):
+                        game.tilt.update(1 / FPS)
+                        if i % (7 * FPS) == 0 and game.world.thunderbolts:
+                                game.world.release_thunder()
+                        start = clock()
+                        game.update()
+                        times.append(clock() - start)
+                        if game.paused:
+                                break
+        finally:
+                game.stop()
+        return times, game
+
+def percentile(ordered, p):
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+def measure(setup, seconds, scale=1, swarm=None, memory=True):
+        frames = max(1, int(seconds * FPS * scale))
+        times, game = run_scenario(setup, frames, swarm)
+        ordered = sorted(times)
+        result = {
+                'frames': len(times),
+                'seconds': sum(times),
+                'fps': len(times) / sum(times),
+                'p50_ms': 1000 * percentile(ordered, 0.5),
+                'p90_ms': 1000 * percentile(ordered, 0.9),
+                'p99_ms': 1000 * percentile(ordered, 0.99),
+                'max_ms': 1000 * ordered[-1],
+                'bees': len(game.world.bees),
+                'score': game.world.score,
+        }
+        if memory:
+                tracemalloc.start()
+                run_scenario(setup, frames, swarm)
+                result['peak_kib'] = tracemalloc.get_traced_memory()[1] / 1024
+                tracemalloc.stop()
+        return result
+
+def git_commit():
+        try:
+                return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, stderr=subprocess.DEVNULL).decode().strip()
+        except Exception:
+                return None
+
+def main(argv=None):
+        parser = argparse.ArgumentParser(description='Benchmarks of the BeeHive game loop.')
+        parser.add_argument('scenarios', nargs='*', help='the scenarios to run (default: all)')
+        parser.add_argument('--scale', type=float, default=1, help='scales the length of every scenario')
+        parser.add_argument('--swarm', choices=('python', 'numpy'), default='python')
+        parser.add_argument('--no-memory', action='store_true', help='skips the run measuring peak memory')
+        parser.add_argument('--json', help='writes the results to this file')
+        parser.add_argument('--compare', help='compares the results with those in this file')
+        parser.add_argument('--list', action='store_true', help='lists the scenarios')
+        args = parser.parse_args(argv)
+
+        if args.list:
+                for name, setup, seconds in SCENARIOS:
+                        print(name)
+                return
+
+        swarm = None
+        if args.swarm == 'numpy':
+                from swarm import NumpySwarm
+                swarm = NumpySwarm
+
+        baseline = {}
+        if args.compare:
+                with open(args.compare) as f:
+                        baseline = json.load(f)['scenarios']
+
+        #The game writes its high score and replays to the working directory.
+        json_path = args.json and os.path.abspath(args.json)
+        os.chdir(tempfile.mkdtemp(prefix='beehive-bench-'))
+
+        results = {}
+        for name, setup, seconds in SCENARIOS:
+                if args.scenarios and name not in args.scenarios:
+                        continue
+                r = results[name] = measure(setup, seconds, args.scale, swarm, not args.no_memory)
+                line = '%-32s %7.0f fps  p50 %6.3f  p99 %6.3f  max %7.3f ms' % (name, r['fps'], r['p50_ms'], r['p99_ms'], r['max_ms'])
+                if 'peak_kib' in r:
+                        line += '  peak %8.0f KiB' % r['peak_kib']
+                if name in baseline:
+                        line += '  (%.2fx fps)' % (r['fps'] / baseline[name]['fps'])
+                print(line)
+
+        if json_path:
+                data = {
+                        'commit': git_commit(),
+                        'python': platform.python_version(),
+                        'swarm': args.swarm,
+                        'scale': args.scale,
+                        'scenarios': results,
+                }
+                with open(json_path, 'w') as f:
+                        json.dump(data, f, indent=1)
+
+if __name__ == '__main__':
+        main()
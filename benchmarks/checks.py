@@ -0,0 +1,90 @@
+"""
+Checks of the behaviour of the Game scene, run headless with the stand-ins for
+Pythonista's scene, ui and sound modules found in benchmarks/stubs:
+
+        python benchmarks/checks.py
+
+Every function named check_* below prepares a new game, and raises an AssertionError
+if the game does not behave as it should.
+"""
+
+import math
+import os
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path[:0] = [os.path.join(HERE, 'stubs'), ROOT]
+
+import BeeHive
+from scene import Touch
+from tilt import TiltInput, SyntheticSource
+
+SEED = 1234
+
+#Starts a new game, in which the player is steered by a scripted tilt of the phone that is
+#sampled once per frame.
+def new_game():
+        game = BeeHive.Game()
+        game.setup()
+        game.paused = False
+        game.new_game(SEED)
+        game.dt = 1 / 60
+        game.tilt.stop()
+        game.tilt = TiltInput(SyntheticSource(lambda t: (0.4 * math.sin(t), 0.4 * math.cos(t / 2))), calibration=1)
+        return game
+
+#Updates the game once per frame until it is paused by a menu, and returns the number of frames.
+def play(game, frames=60 * 60 * 10):
+        for i in range(frames):
+                game.tilt.update(game.dt)
+                game.update()
+                if game.paused:
+                        return i + 1
+        raise AssertionError('The game did not end')
+
+#A tap on the first thunderbolt releases that one only, although the next one moves up
+#under the finger.
+def check_one_thunderbolt_per_tap():
+        game = new_game()
+        try:
+                game.world.thunderbolts = 3
+                for i in range(3):
+                        game.thunderbolts.append(game.thunderbolt_pool.get(game))
+                game.sort_thunderbolts()
+
+                game.touch_began(Touch((20, 20)))
+                assert game.world.thunderbolts == 2, game.world.thunderbolts
+                assert len(game.thunderbolts) == 2, len(game.thunderbolts)
+                assert tuple(game.thunderbolts[0].position) == (20, 20)
+        finally:
+                game.stop()
+
+#The last game can be watched from the Game Over menu, and plays out as it did.
+def check_replay_from_menu():
+        game = new_game()
+        try:
+                frames = play(game)
+                score, t = game.world.score, game.world.t
+                assert 'Replay' in game.menu.button_titles, game.menu.button_titles
+
+                game.menu_button_selected('Replay')
+                assert game.replay is not None
+                assert play(game) == frames
+                assert (game.world.score, game.world.t) == (score, t), (game.world.score, game.world.t)
+                assert game.world.over
+                assert game.history.summary['games'] == 1, game.history.summary
+        finally:
+                game.stop()
+
+def main():
+        #The game writes its high score and snapshots to the working directory.
+        os.chdir(tempfile.mkdtemp(prefix='beehive-checks-'))
+        checks = [(name, f) for name, f in sorted(globals().items()) if name.startswith('check_')]
+        for name, check in checks:
+                check()
+                print('ok  ' + name)
+
+if __name__ == '__main__':
+        main()
@@ -0,0 +1,9 @@
+"""
+A stand-in for the MenuScene from Pythonista's examples, for the benchmarks.
+"""
+
+class MenuScene (object):
+        def __init__(self, title, subtitle, button_titles):
+                self.title = title
+                self.subtitle = subtitle
+                self.button_titles = button_titles
@@ -0,0 +1,12 @@
+"""
+A stand-in for Pythonista's motion module, for the benchmarks. The phone is lying flat.
+"""
+
+def start_updates():
+        pass
+
+def stop_updates():
+        pass
+
+def get_gravity():
+        return (0.0, 0.0, -1.0)
@@ -0,0 +1,215 @@
+"""
+A stand-in for Pythonista's scene module, with just enough of it for the game to run
+headless in the benchmarks. Nodes keep their attributes and children but are never
+drawn. Actions finish the moment they are run, which means that the functions in
+Action.call are called right away.
+
+The tilt of the phone is fed to the game by the benchmark itself, through a
+tilt.SyntheticSource, so there is no stand-in for gravity().
+"""
+
+import ui
+
+PORTRAIT = 'portrait'
+LANDSCAPE = 'landscape'
+
+class Size (object):
+        def __init__(self, w=0, h=0):
+                self.w = self.x = w
+                self.h = self.y = h
+
+        def __iter__(self):
+                return iter((self.w, self.h))
+
+class Vector2 (object):
+        def __init__(self, x=0, y=0):
+                self.x = x
+                self.y = y
+
+        def __iter__(self):
+                return iter((self.x, self.y))
+
+        def __getitem__(self, i):
+                return (self.x, self.y)[i]
+
+class Rect (object):
+        def __init__(self, x, y, w, h):
+                self.x, self.y, self.w, self.h = x, y, w, h
+
+        def __contains__(self, point):
+                return self.x <= point[0] <= self.x + self.w and self.y <= point[1] <= self.y + self.h
+
+class Action (object):
+        def __init__(self, kind, *args):
+                self.kind = kind
+                self.args = args
+
+        @classmethod
+        def fade_to(cls, alpha, duration=0.5):
+                return cls('fade_to', alpha, duration)
+
+        @classmethod
+        def scale_to(cls, scale, duration=0.5):
+                return cls('scale_to', scale, duration)
+
+        @classmethod
+        def wait(cls, duration):
+                return cls('wait', duration)
+
+        @classmethod
+        def call(cls, function, duration=None):
+                return cls('call', function)
+
+        @classmethod
+        def remove(cls):
+                return cls('remove')
+
+        @classmethod
+        def sequence(cls, *actions):
+                if len(actions) == 1 and isinstance(actions[0], list):
+                        actions = actions[0]
+                return cls('sequence', *actions)
+
+        @classmethod
+        def group(cls, *actions):
+                if len(actions) == 1 and isinstance(actions[0], list):
+                        actions = actions[0]
+                return cls('group', *actions)
+
+        @classmethod
+        def repeat(cls, action, count):
+                return cls('repeat', action, count)
+
+        #Applies the action to the node as if it had run to its end.
+        def finish(self, node):
+                if self.kind in ('sequence', 'group'):
+                        for action in self.args:
+                                action.finish(node)
+                elif self.kind == 'repeat' and self.args[1] > 0:
+                        for i in range(self.args[1]):
+                                self.args[0].finish(node)
+                elif self.kind == 'fade_to':
+                        node.alpha = self.args[0]
+                elif self.kind == 'scale_to':
+                        node.scale = self.args[0]
+                elif self.kind == 'call':
+                        self.args[0]()
+                elif self.kind == 'remove':
+                        node.remove_from_parent()
+
+class Texture (object):
+        def __init__(self, image):
+                self.size = Size(0, 0)
+
+class Node (object):
+        def __init__(self, position=(0, 0), z_position=0, scale=1, alpha=1, parent=None, **kwargs):
+                self.children = []
+                self.parent = None
+                self.position = position
+                self.z_position = z_position
+                self.scale = scale
+                self.alpha = alpha
+                self.anchor_point = (0.5, 0.5)
+                self.size = Size(0, 0)
+                for name, value in kwargs.items():
+                        setattr(self, name, value)
+                if parent is not None:
+                        parent.add_child(self)
+
+        @property
+        def position(self):
+                return self._position
+
+        @position.setter
+        def position(self, value):
+                self._position = Vector2(value[0], value[1])
+
+        @property
+        def frame(self):
+                p = self._position
+                return Rect(p.x - self.size.w / 2, p.y - self.size.h / 2, self.size.w, self.size.h)
+
+        def add_child(self, node):
+                if node.parent is not None:
+                        node.remove_from_parent()
+                self.children.append(node)
+                node.parent = self
+
+        def remove_from_parent(self):
+                if self.parent is not None:
+                        self.parent.children.remove(self)
+                        self.parent = None
+
+        def run_action(self, action, key=None):
+                action.finish(self)
+
+        def remove_action(self, key):
+                pass
+
+        def remove_all_actions(self):
+                pass
+
+class ShapeNode (Node):
+        def __init__(self, path=None, fill_color='white', stroke_color='clear', shadow=None, **kwargs):
+                Node.__init__(self, **kwargs)
+                self.fill_color = fill_color
+                self.stroke_color = stroke_color
+                self.path = path
+
+        @property
+        def path(self):
+                return self._path
+
+        @path.setter
+        def path(self, path):
+                self._path = path
+                if path is not None:
+                        self.size = Size(path.bounds[2] + 1, path.bounds[3] + 1)
+
+class SpriteNode (Node):
+        def __init__(self, texture=None, **kwargs):
+                size = kwargs.pop('size', None)
+                Node.__init__(self, **kwargs)
+                self.texture = texture
+                if size is not None:
+                        self.size = size
+
+        @property
+        def size(self):
+                return self._size
+
+        @size.setter
+        def size(self, value):
+                self._size = Size(value[0], value[1]) if not isinstance(value, Size) else value
+
+class LabelNode (Node):
+        def __init__(self, text='', font=('Helvetica', 20), color='white', **kwargs):
+                Node.__init__(self, **kwargs)
+                self.text = text
+                self.font = font
+                self.color = color
+
+class Touch (object):
+        def __init__(self, location):
+                self.location = Vector2(location[0], location[1])
+
+class Scene (Node):
+        def __init__(self, size=(375, 667), **kwargs):
+                Node.__init__(self, **kwargs)
+                self.size = Size(*size)
+                self.dt = 1 / 60
+                self.t = 0
+                self.paused = False
+                self.background_color = 'white'
+
+        def present_modal_scene(self, scene):
+                self.presented_scene = scene
+
+        def dismiss_modal_scene(self):
+                self.presented_scene = None
+
+def get_screen_scale():
+        return 2.0
+
+def run(scene, orientation=None, frame_interval=1, anti_alias=False, show_fps=False, multi_touch=True):
+        scene.setup()
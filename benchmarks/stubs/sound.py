@@ -0,0 +1,12 @@
+"""
+A stand-in for Pythonista's sound module, for the benchmarks. No sound is played.
+"""
+
+def load_effect(name):
+        pass
+
+def play_effect(name, volume=1.0, pitch=1.0):
+        return 0
+
+def stop_effect(effect):
+        pass
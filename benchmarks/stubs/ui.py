@@ -0,0 +1,46 @@
+"""
+A stand-in for Pythonista's ui module, with just enough of it for the game to run
+headless in the benchmarks. Nothing is drawn.
+"""
+
+class Path (object):
+        def __init__(self, w=0, h=0):
+                self.bounds = (0, 0, w, h)
+
+        @classmethod
+        def oval(cls, x, y, w, h):
+                return cls(w, h)
+
+        @classmethod
+        def rect(cls, x, y, w, h):
+                return cls(w, h)
+
+        def fill(self):
+                pass
+
+        def stroke(self):
+                pass
+
+class Image (object):
+        @classmethod
+        def named(cls, name):
+                return cls()
+
+        def to_png(self):
+                return b''
+
+class ImageContext (object):
+        def __init__(self, w, h, scale=0):
+                pass
+
+        def __enter__(self):
+                return self
+
+        def __exit__(self, *args):
+                pass
+
+        def get_image(self):
+                return Image()
+
+def set_color(color):
+        pass
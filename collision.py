@@ -0,0 +1,55 @@
+"""
+The collisions of the player with the bees and pickups.
+
+Every entity is a circle with a logical radius: half of its size, outline included (see
+simulation.OUTLINE). The bees and the player keep their radius as an attribute that is
+updated as their age changes, rather than working it out from the size of their nodes
+for every check, and the pickups have one radius per kind. For the pickups, the squared
+sums of each radius with that of the player are worked out once for each size of the
+player (see Hitboxes), so each check is a comparison of two squared distances.
+
+player_hits() checks the player against the bees near it and against all pickups in
+one pass, and fills a list of the entities hit, which the world then handles by their
+kind. The list is reused from step to step, and nothing is allocated per pair checked.
+"""
+
+#The squared reach of the player to the pickups of each kind.
+class Hitboxes (object):
+        def __init__(self, radii):
+                self.radii = list(radii) #The radius of the pickups of each kind, indexed by kind code
+                self.player_radius = None
+                self.reach2 = [0] * len(self.radii)
+
+        #Works out the squared sums of the radii for the given radius of the player.
+        def aim(self, player_radius):
+                if player_radius != self.player_radius:
+                        self.player_radius = player_radius
+                        self.reach2 = [(player_radius + r) ** 2 for r in self.radii]
+                return self.reach2
+
+#Clears the list of hits and fills it with the bees (out of the candidates given) and the
+#pickups (out of a PickupStore) that overlap the player, the bees first. Returns the list.
+def player_hits(player, bees, pickups, hitboxes, hits):
+        del hits[:]
+        px = player.x
+        py = player.y
+        pr = player.radius
+
+        for bee in bees:
+                dx = bee.x - px
+                dy = bee.y - py
+                r = pr + bee.radius
+                if dx * dx + dy * dy < r * r:
+                        hits.append(bee)
+
+        reach2 = hitboxes.aim(pr)
+        xs = pickups.x
+        ys = pickups.y
+        kinds = pickups.kind
+        items = pickups.items
+        for i in range(len(items)):
+                dx = xs[i] - px
+                dy = ys[i] - py
+                if dx * dx + dy * dy < reach2[kinds[i]]:
+                        hits.append(items[i])
+        return hits
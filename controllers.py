@@ -0,0 +1,167 @@
+"""
+Players that are not a person holding the phone.
+
+A controller stands in for the tilt of the phone and for the taps on the thunderbolts:
+Once per frame, it is asked for the velocity of the player and for whether to release
+a thunderbolt, given the world as it is. The Game scene uses a controller in place of
+the gravity sensor when it is given one (see AUTOPLAY in BeeHive.py), and batch.py
+uses one to play its games.
+
+Two controllers come with the game: Scripted, which heads for the nearest pickup and
+shies away from the bees close to it, and Planner, which looks a few ticks ahead.
+"""
+
+import math
+from simulation import HONEYCOMB, FLOWER, HEART, LIGHTNING
+
+#The kinds of pickups the controllers go for.
+WANTED = (HONEYCOMB, FLOWER, HEART, LIGHTNING)
+
+#The base of the controllers. Any object with the two methods below can be used as one:
+#reset(world), called as a new game is started, and control(world), which returns the
+#velocity (u, v) of the player for the next frame, where a length of 1 is the player's top
+#speed (see World.update_player), and whether to release a thunderbolt before it. The base
+#class only provides a reset() that does nothing.
+class Controller (object):
+        def reset(self, world):
+                pass
+
+#Returns the nearest pickup of the wanted kinds that the player can reach before it expires,
+#or None.
+def nearest_pickup(world, speed):
+        p = world.player
+        best = None
+        best_d2 = float('inf')
+        for q in world.pickups:
+                if q.kind not in WANTED:
+                        continue
+                d2 = (q.x - p.x) ** 2 + (q.y - p.y) ** 2
+                if d2 < best_d2 and math.sqrt(d2) / speed * world.tick < q.birthtime + q.lifetime - world.t:
+                        best = q
+                        best_d2 = d2
+        return best
+
+#Heads for the nearest pickup, and away from the bees close to it (unless it is in attack
+#mode). Releases thunder as soon as a bee comes close.
+class Scripted (Controller):
+        def control(self, world):
+                p = world.player
+                fx = fy = 0
+                thunder = False
+                target = nearest_pickup(world, 10 * world.scale)
+                if target is not None:
+                        d = math.hypot(target.x - p.x, target.y - p.y) or 1
+                        fx += (target.x - p.x) / d
+                        fy += (target.y - p.y) / d
+
+                if not p.attack:
+                        for bee in world.bees:
+                                dx = p.x - bee.x
+                                dy = p.y - bee.y
+                                d2 = dx * dx + dy * dy
+                                reach = 0.5 * (p.size + bee.size) + 40
+                                if d2 < reach * reach:
+                                        d = math.sqrt(d2) or 1
+                                        push = 2 * reach / d
+                                        fx += push * dx / d
+                                        fy += push * dy / d
+                                        thunder = bool(world.thunderbolts and not world.thunder)
+
+                return max(-1, min(1, fx)), max(-1, min(1, fy)), thunder
+
+#Plans a few ticks ahead: Each frame, the player's path is simulated for every one of a
+#handful of directions (and for standing still) over the next horizon ticks, and the
+#direction with the lowest cost is taken. The cost of a path grows as it comes close to
+#the predicted positions of the bees, and with the number of ticks it takes to get to the
+#nearest pickup (the ticks of the path plus the ticks left from its closest point).
+#
+#The bees are predicted to keep their current velocity, which is what Bee.move does on
+#average, and to bounce off the walls. Only the threats bees closest to the player are
+#considered, which keeps the cost of planning at horizon * threats * (directions + 1)
+#distance checks however crowded the hive is.
+class Planner (Controller):
+        def __init__(self, horizon=8, directions=8, threats=8, margin=12):
+                self.horizon = horizon
+                self.threats = threats
+                self.margin = margin #The extra distance kept from the bees
+                self.moves = [(0, 0)] + [(math.cos(2 * math.pi * k / directions), math.sin(2 * math.pi * k / directions)) for k in range(directions)]
+
+        #Returns the predicted positions of the closest bees at each of the next horizon ticks,
+        #as lists of (x, y, r2, m2), where r2 is the squared distance at which the bee hits the
+        #player and m2 the squared distance it should be kept at.
+        def predict(self, world):
+                p = world.player
+                close = []
+                for bee in world.bees:
+                        if bee.dying or not bee.inHive:
+                                continue
+                        dx = bee.x - p.x
+                        dy = bee.y - p.y
+                        close.append((dx * dx + dy * dy, bee))
+                close.sort(key=lambda c: c[0])
+
+                rate = world.stride / world.walk_every #The distance moved per tick per unit of velocity
+                w = world.width
+                h = world.height
+                steps = [[] for k in range(self.horizon)]
+                for d2, bee in close[:self.threats]:
+                        x = bee.x
+                        y = bee.y
+                        vx = bee.speedright * rate
+                        vy = bee.speedup * rate
+                        r = 0.5 * (p.size + bee.size)
+                        r2 = r * r
+                        m2 = (r + self.margin) ** 2
+                        for step in steps:
+                                x += vx
+                                y += vy
+                                if (x < 0 and vx < 0) or (x > w and vx > 0):
+                                        vx = -vx
+                                if (y < 0 and vy < 0) or (y > h and vy > 0):
+                                        vy = -vy
+                                step.append((x, y, r2, m2))
+                return steps
+
+        def control(self, world):
+                p = world.player
+                speed = 10 * world.scale
+                w = world.width
+                h = world.height
+                target = nearest_pickup(world, speed)
+                steps = [[]] * self.horizon if p.immune or p.attack else self.predict(world)
+
+                best = None
+                best_cost = float('inf')
+                best_hit = False
+                for u, v in self.moves:
+                        x = p.x
+                        y = p.y
+                        cost = 0
+                        hit = False
+                        weight = 1
+                        tx, ty = (target.x, target.y) if target is not None else (0.5 * w, 0.5 * h)
+                        arrival = float('inf')
+                        for k, step in enumerate(steps, 1):
+                                x = max(0, min(w, x + u * speed))
+                                y = max(0, min(h, y + v * speed))
+                                for bx, by, r2, m2 in step:
+                                        d2 = (bx - x) ** 2 + (by - y) ** 2
+                                        if d2 < m2:
+                                                cost += weight * (1000 if d2 < r2 else 100 * (1 - d2 / m2))
+                                                hit = hit or d2 < r2
+                                weight *= 0.85
+                                arrival = min(arrival, k + math.hypot(tx - x, ty - y) / speed)
+                        #Without a pickup to go for, the player drifts towards the centre of the hive.
+                        cost += arrival if target is not None else 0.1 * arrival
+                        if cost < best_cost:
+                                best = (u, v)
+                                best_cost = cost
+                                best_hit = hit
+
+                #When every path runs into a bee, the bees are pacified.
+                thunder = best_hit and world.thunderbolts > 0 and not world.thunder
+                u, v = best
+                return u, v, thunder
+
+#The controllers by name, as chosen on the command line.
+CONTROLLERS = {'scripted': Scripted, 'planner': Planner}
@@ -0,0 +1,57 @@
+"""
+The timed effects shown on the player.
+
+The blinking of the player used to be a new sequence of fade actions, built and run
+every time the player was hit or collected a flower. Two flowers in a row queued two
+chains of actions on the same node, which then fought over its alpha. The timelines
+below are built once, as the module is imported, and shared by every run. A Blinker
+plays at most one of them on its node at a time, under a key of its own, and is driven
+by the state of the world rather than by its events: Each frame, it is told which
+timeline the state calls for and when that state ends. It starts the timeline as that
+changes, and stops it (restoring the alpha) once the state is over.
+"""
+
+from scene import *
+
+#The (alpha, duration) steps of the timelines. The player blinks while it is immune,
+#its centre blinks while it is in attack mode, and the player pulses while it is doubled
+#in size by a red flower. Each timeline lasts as long as its state in the world.
+IMMUNITY_BLINK = [(0.1, 0.5), (1, 0.5), (0.1, 1), (1, 0.5), (0.1, 0.5), (1, 0.5)]
+ATTACK_BLINK = IMMUNITY_BLINK + IMMUNITY_BLINK
+GIANT_PULSE = [(0.6, 0.5), (1, 0.5)] * 7
+
+def timeline(steps):
+        return Action.sequence([Action.fade_to(alpha, duration) for alpha, duration in steps])
+
+#The timelines by name.
+TIMELINES = {
+        'immunity': timeline(IMMUNITY_BLINK),
+        'attack': timeline(ATTACK_BLINK),
+        'giant': timeline(GIANT_PULSE),
+}
+
+class Blinker (object):
+        def __init__(self, node, key='blink', timelines=TIMELINES):
+                self.node = node
+                self.key = key
+                self.timelines = timelines
+                self.playing = None #The name and end of the timeline playing
+
+        #Plays the named timeline for a state ending at the given time, or stops the timeline
+        #playing if name is None. A timeline already playing for the same state is left alone,
+        #and one playing for another state is replaced.
+        def play(self, name, until=0):
+                if name is None:
+                        if self.playing is not None:
+                                self.stop()
+                        return
+                state = (name, until)
+                if state != self.playing:
+                        self.node.remove_action(self.key)
+                        self.node.run_action(self.timelines[name], self.key)
+                        self.playing = state
+
+        def stop(self):
+                self.node.remove_action(self.key)
+                self.node.alpha = 1
+                self.playing = None
@@ -0,0 +1,102 @@
+"""
+The particles of the dust clouds.
+
+A dust cloud used to be ten ShapeNodes (each with a path of its own) added as children
+of the node that had hit the floor, which made a mass die-off a burst of node creation
+and layout. The Emitter below keeps the state of a fixed budget of particles in flat
+typed arrays (position, velocity, age and lifetime), and shows them with the same
+number of SpriteNodes, created once as children of a single layer and all sharing one
+small texture, which the renderer can draw in one batch. A cloud only writes a few
+numbers into the arrays, so many clouds at once cost about the same as one.
+
+The particles are handed out round-robin. Since all particles of the game live for the
+same time, the slot handed out next is always the oldest one, and once the budget is
+used up the oldest particles are recycled first.
+"""
+
+from array import array
+from scene import *
+import math
+import random
+import ui
+
+#Returns the texture shared by all particles: a white circle of the given diameter.
+def dot_texture(d=16):
+        with ui.ImageContext(d, d) as ctx:
+                ui.set_color('white')
+                ui.Path.oval(0, 0, d, d).fill()
+                return Texture(ctx.get_image())
+
+class Emitter (object):
+        def __init__(self, parent, budget=60, lifetime=1, texture=None):
+                self.budget = budget #The number of particles that can be shown at the same time
+                self.lifetime = lifetime #The number of seconds over which a particle fades out
+                self.x = array('d', [0]) * budget
+                self.y = array('d', [0]) * budget
+                self.vx = array('d', [0]) * budget
+                self.vy = array('d', [0]) * budget
+                self.age = array('d', [0]) * budget
+                self.life = array('d', [0]) * budget #0 for the slots not in use
+                self.next = 0 #The slot handed out next
+                self.left = 0 #The number of seconds until the last particle has faded out
+                self.emitted = 0
+                self.random = random.Random() #Draws the sizes of the particles, apart from the game's own generator
+
+                self.layer = Node(parent=parent)
+                self.layer.z_position = 1
+                texture = texture or dot_texture()
+                self.nodes = [SpriteNode(texture, parent=self.layer, alpha=0) for i in range(budget)]
+
+        #Adds a particle at (x, y), moving with the velocity (vx, vy) in points per second.
+        def emit(self, x, y, vx=0, vy=0, size=5):
+                i = self.next
+                self.next = (i + 1) % self.budget
+                self.x[i] = x
+                self.y[i] = y
+                self.vx[i] = vx
+                self.vy[i] = vy
+                self.age[i] = 0
+                self.life[i] = self.lifetime
+                node = self.nodes[i]
+                node.position = (x, y)
+                node.size = (size, size)
+                node.alpha = 1
+                self.left = self.lifetime
+                self.emitted += 1
+
+        #Adds a cloud of the given number of particles, spread evenly in a ring around (x, y) and
+        #drifting outwards at the given speed.
+        def cloud(self, x, y, particles=10, radius=7, speed=4):
+                rng = self.random
+                for i in range(particles):
+                        c = math.cos(2 * math.pi * i / particles)
+                        s = math.sin(2 * math.pi * i / particles)
+                        self.emit(x + radius * c, y + radius * s, speed * c, speed * s, rng.randint(3, 7))
+
+        #Moves the particles on by dt seconds, and fades them out over their lifetime.
+        def update(self, dt):
+                if self.left <= 0:
+                        return
+                self.left -= dt
+                x, y, vx, vy, age, life, nodes = self.x, self.y, self.vx, self.vy, self.age, self.life, self.nodes
+                for i in range(self.budget):
+                        if life[i] == 0:
+                                continue
+                        a = age[i] + dt
+                        node = nodes[i]
+                        if a >= life[i]:
+                                life[i] = 0
+                                node.alpha = 0
+                                continue
+                        age[i] = a
+                        x[i] += vx[i] * dt
+                        y[i] += vy[i] * dt
+                        node.position = (x[i], y[i])
+                        node.alpha = 1 - a / life[i]
+
+        #Takes all particles out of the scene, as a new game is started.
+        def clear(self):
+                for i in range(self.budget):
+                        self.life[i] = 0
+                        self.nodes[i].alpha = 0
+                self.left = 0
@@ -0,0 +1,82 @@
+"""
+Writing files off the update loop.
+
+Files such as the high score used to be rewritten from within the update loop, so a
+slow write became a dropped frame. The BackgroundWriter below takes the contents of
+files to be written and writes them from a thread of its own, either as it is asked
+to flush (at the end of a game) or every few seconds. Writing the same file several
+times before a flush only writes the last contents, and every file is written to a
+temporary file first and then renamed, so a crash in the middle of a write leaves
+the previous version of the file in place. A file can also be removed in the same way,
+by writing None to it.
+"""
+
+import os
+import threading
+
+#Writes the data to a temporary file next to the path and renames it to the path.
+def atomic_write(path, data):
+        mode = 'wb' if isinstance(data, (bytes, bytearray)) else 'w'
+        tmp = path + '.tmp'
+        with open(tmp, mode) as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+class BackgroundWriter (object):
+        def __init__(self, interval=5):
+                self.interval = interval #Seconds between the writes of pending files
+                self.pending = {} #Maps each path to the data to be written to it
+                self.lock = threading.Lock()
+                self.wake = threading.Event()
+                self.idle = threading.Event()
+                self.idle.set()
+                self.running = True
+                self.errors = []
+                self.thread = threading.Thread(target=self.run, name='BackgroundWriter')
+                self.thread.daemon = True
+                self.thread.start()
+
+        #Schedules the data (a string or bytes) to be written to the path, or the file at the
+        #path to be removed if the data is None.
+        def write(self, path, data):
+                with self.lock:
+                        self.pending[path] = data
+                        self.idle.clear()
+
+        #Asks for the pending files to be written now, without waiting for them.
+        def flush(self):
+                self.wake.set()
+
+        #Waits until all pending files have been written. Returns False on timeout.
+        def wait(self, timeout=None):
+                self.flush()
+                return self.idle.wait(timeout)
+
+        def close(self, timeout=None):
+                self.running = False
+                self.wait(timeout)
+                self.thread.join(timeout)
+
+        def run(self):
+                while True:
+                        self.wake.wait(self.interval)
+                        self.wake.clear()
+                        with self.lock:
+                                pending = self.pending
+                                self.pending = {}
+                        for path, data in pending.items():
+                                try:
+                                        if data is None:
+                                                if os.path.exists(path):
+                                                        os.remove(path)
+                                        else:
+                                                atomic_write(path, data)
+                                except Exception as e:
+                                        self.errors.append((path, e))
+                        with self.lock:
+                                if not self.pending:
+                                        self.idle.set()
+                        if not self.running:
+                                break
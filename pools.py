@@ -0,0 +1,44 @@
+"""
+Pools of nodes that are recycled rather than thrown away.
+
+Every bee, pickup and thunderbolt used to be a new node (with children of its own),
+which made the moments when many things are born or die at once the moments with the
+most allocation and garbage collection. A pool keeps the nodes that have left the scene
+and hands them out again, with their actions removed, their alpha restored and their
+reset() method (if any) called.
+"""
+
+from scene import *
+
+class NodePool (object):
+        def __init__(self, factory):
+                self.factory = factory #Creates a new node when the pool is empty
+                self.free = []
+                self.created = 0
+
+        def __len__(self):
+                return len(self.free)
+
+        #Returns a node from the pool, or a new node if the pool is empty, added to the parent.
+        def get(self, parent):
+                if self.free:
+                        node = self.free.pop()
+                else:
+                        node = self.factory()
+                        self.created += 1
+                parent.add_child(node)
+                return node
+
+        #Takes the node out of the scene and returns it to the pool.
+        def put(self, node):
+                node.remove_all_actions()
+                node.remove_from_parent()
+                node.alpha = 1
+                reset = getattr(node, 'reset', None)
+                if reset:
+                        reset()
+                self.free.append(node)
+
+        #An action returning the node to the pool, to be run at the end of a sequence.
+        def recycle(self, node):
+                return Action.call(lambda: self.put(node))
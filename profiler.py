@@ -0,0 +1,116 @@
+"""
+Frame-time instrumentation for the stages of the game loop.
+
+A frame is timed by calling begin() at its start, lap(name) at the end of each stage
+and end() as the frame is done. The time (and the net number of memory blocks
+allocated) since the previous call is attributed to the named stage, so laps are cheap
+enough to leave in the loop. The last few hundred frames of each stage are kept for
+the percentiles shown in the overlay and written out by dumps().
+
+The World and the Game scene use a NullProfiler, whose methods do nothing, unless a
+Profiler is given to them.
+"""
+
+from collections import OrderedDict, deque
+import json
+import sys
+import time
+
+#Counts the memory blocks currently allocated by the interpreter, where available.
+allocated_blocks = getattr(sys, 'getallocatedblocks', lambda: 0)
+
+class NullProfiler (object):
+        frames = 0
+
+        def begin(self):
+                pass
+
+        def lap(self, name):
+                pass
+
+        def end(self):
+                pass
+
+#The samples of one stage.
+class Stage (object):
+        def __init__(self, window):
+                self.times = deque(maxlen=window) #Seconds spent in the stage, per frame
+                self.blocks = deque(maxlen=window) #Net memory blocks allocated in the stage, per frame
+                self.time = 0
+                self.block = 0
+
+        def push(self):
+                self.times.append(self.time)
+                self.blocks.append(self.block)
+                self.time = 0
+                self.block = 0
+
+def percentile(values, p):
+        if not values:
+                return 0
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+class Profiler (object):
+        def __init__(self, window=300):
+                self.window = window #The number of frames kept for each stage
+                self.stages = OrderedDict()
+                self.frames = 0
+                self.last = self.start = time.perf_counter()
+                self.last_blocks = allocated_blocks()
+
+        def stage(self, name):
+                stage = self.stages.get(name)
+                if stage is None:
+                        stage = self.stages[name] = Stage(self.window)
+                return stage
+
+        def begin(self):
+                self.last = self.start = time.perf_counter()
+                self.last_blocks = allocated_blocks()
+
+        #Attributes the time since the previous lap (or the start of the frame) to the named stage.
+        def lap(self, name):
+                now = time.perf_counter()
+                blocks = allocated_blocks()
+                stage = self.stages.get(name) or self.stage(name)
+                stage.time += now - self.last
+                stage.block += blocks - self.last_blocks
+                self.last = now
+                self.last_blocks = blocks
+
+        def end(self):
+                frame = self.stage('frame')
+                frame.time = time.perf_counter() - self.start
+                for stage in self.stages.values():
+                        stage.push()
+                self.frames += 1
+
+        #Returns the p50 and p99 times (in milliseconds), and the mean number of blocks
+        #allocated per frame, of each stage.
+        def summary(self):
+                result = OrderedDict()
+                for name, stage in self.stages.items():
+                        n = len(stage.blocks)
+                        result[name] = {
+                                'p50': 1000 * percentile(stage.times, 0.5),
+                                'p99': 1000 * percentile(stage.times, 0.99),
+                                'blocks': sum(stage.blocks) / n if n else 0,
+                        }
+                return result
+
+        #Returns one line of text for each stage.
+        def report(self):
+                lines = []
+                for name, s in self.summary().items():
+                        lines.append('%-10s %5.2f %5.2f ms %+6.1f' % (name, s['p50'], s['p99'], s['blocks']))
+                return lines
+
+        #Returns the summary, along with the samples of each stage, as JSON.
+        def dumps(self):
+                data = {
+                        'frames': self.frames,
+                        'summary': self.summary(),
+                        'samples': OrderedDict((name, {'times': list(stage.times), 'blocks': list(stage.blocks)}) for name, stage in self.stages.items()),
+                }
+                return json.dumps(data, indent=1)
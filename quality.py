@@ -0,0 +1,78 @@
+"""
+Shedding load when the frames take too long.
+
+The Governor below watches the time between frames, and the time spent in the update
+loop of each frame, over a window of recent frames. While frames are being dropped (or
+the update loop uses up most of the budget of a frame), it steps down through the
+quality tiers in TIERS, one tier per window. Once the frames are on time and the update
+loop leaves plenty of headroom for a few windows in a row, it steps back up again.
+
+Each tier says how many particles a dust cloud has, how often a sound effect may be
+played, whether the bees grow by scaling a node of fixed size rather than by swapping
+its path, and whether the hexagonal wall is shown. The Game scene reads the current
+tier as it shows the world.
+"""
+
+from collections import deque, namedtuple
+
+#dust: The number of particles in a dust cloud.
+#sound_interval: The least number of seconds between two sound effects.
+#scale_only: Whether the bees grow and shrink by scaling rather than by swapping their paths.
+#wall: Whether the hexagonal wall is shown.
+Tier = namedtuple('Tier', 'dust sound_interval scale_only wall')
+
+TIERS = (
+        Tier(dust=10, sound_interval=0, scale_only=False, wall=True),
+        Tier(dust=5, sound_interval=0.05, scale_only=False, wall=True),
+        Tier(dust=5, sound_interval=0.1, scale_only=False, wall=True),
+        Tier(dust=0, sound_interval=0.1, scale_only=True, wall=True),
+        Tier(dust=0, sound_interval=0.2, scale_only=True, wall=False),
+)
+
+class Governor (object):
+        def __init__(self, budget=1/60, window=30, recovery=4, tiers=TIERS):
+                self.budget = budget #The time of a frame in seconds
+                self.window = window #The number of frames looked at before each change of tier
+                self.recovery = recovery #The number of windows with headroom before stepping back up
+                self.tiers = tiers
+                self.level = 0
+                self.dts = deque(maxlen=window)
+                self.works = deque(maxlen=window)
+                self.calm = 0 #The number of windows in a row with headroom
+
+        @property
+        def tier(self):
+                return self.tiers[self.level]
+
+        def reset(self):
+                self.dts.clear()
+                self.works.clear()
+                self.calm = 0
+
+        #Takes the time since the last frame and the time spent in the update loop of this
+        #frame (both in seconds). Returns True if the tier has changed.
+        def frame(self, dt, work):
+                self.dts.append(dt)
+                self.works.append(work)
+                if len(self.dts) < self.window:
+                        return False
+
+                dt = sum(self.dts) / self.window
+                work = sum(self.works) / self.window
+                self.dts.clear()
+                self.works.clear()
+
+                if (dt > 1.2 * self.budget or work > 0.8 * self.budget) and self.level < len(self.tiers) - 1:
+                        self.level += 1
+                        self.calm = 0
+                        return True
+
+                if dt < 1.05 * self.budget and work < 0.4 * self.budget:
+                        self.calm += 1
+                        if self.calm >= self.recovery and self.level > 0:
+                                self.level -= 1
+                                self.calm = 0
+                                return True
+                else:
+                        self.calm = 0
+                return False
@@ -0,0 +1,74 @@
+"""
+Recording and replaying games.
+
+Given its seed and tick rate, a World plays out the same way every time it is fed the
+same inputs. The inputs of a frame are the time since the previous frame, the velocity
+of the player (as read from the tilt of the phone, see tilt.py) and whether the player
+released a thunderbolt, and the Recorder packs these into 13 bytes per frame. Since the values are stored as 32-bit floats,
+the Recorder hands the rounded values back to the game, which steps the world with
+exactly the values that end up in the file.
+
+A replay file starts with a header holding the seed, the size and the tick rate of the
+world, followed by one record per frame:
+
+        from replay import Replay, replay_world
+        world = replay_world(Replay.load('.beehive_last_replay'))
+"""
+
+import struct
+from simulation import World
+
+MAGIC = b'BHRP'
+VERSION = 3
+HEADER = struct.Struct('<4sHQddH') #Magic, version, seed, width, height, tick rate
+FRAME = struct.Struct('<fffB') #dt, u, v, flags
+
+#The flags of a frame.
+THUNDER = 1 #The player released a thunderbolt before the frame
+
+class Recorder (object):
+        def __init__(self, seed, width, height, tick_rate):
+                self.data = bytearray(HEADER.pack(MAGIC, VERSION, seed, width, height, tick_rate))
+                self.flags = 0
+                self.frames = 0
+
+        def release_thunder(self):
+                self.flags |= THUNDER
+
+        #Records the inputs of a frame, and returns them as they will be read back.
+        def frame(self, dt, u, v):
+                packed = FRAME.pack(dt, u, v, self.flags)
+                self.data += packed
+                self.flags = 0
+                self.frames += 1
+                return FRAME.unpack(packed)[:3]
+
+class Replay (object):
+        def __init__(self, data):
+                magic, version, self.seed, self.width, self.height, self.tick_rate = HEADER.unpack_from(data)
+                if magic != MAGIC:
+                        raise ValueError('Not a BeeHive replay')
+                if version != VERSION:
+                        raise ValueError('BeeHive replay of unsupported version %i' % version)
+                self.data = bytes(data[HEADER.size:])
+
+        @classmethod
+        def load(cls, path):
+                with open(path, 'rb') as f:
+                        return cls(f.read())
+
+        def __len__(self):
+                return len(self.data) // FRAME.size
+
+        #Yields the (dt, u, v, flags) of each frame.
+        def __iter__(self):
+                return FRAME.iter_unpack(self.data)
+
+#Plays a replay in a new world, and returns the world as it is after the last frame.
+def replay_world(replay, **kwargs):
+        world = World(replay.width, replay.height, seed=replay.seed, tick_rate=replay.tick_rate, **kwargs)
+        for dt, u, v, flags in replay:
+                if flags & THUNDER:
+                        world.release_thunder()
+                world.advance(dt, u, v)
+        return world
@@ -0,0 +1,121 @@
+"""
+A scheduler for the timed events of a game.
+
+Functions are scheduled to be called at a given time, and are kept in a heap ordered
+by that time. Running the scheduler only looks at the top of the heap, so a step in
+which nothing is due costs the same no matter how many events are pending. Events
+scheduled for the same time are called in the order they were scheduled.
+
+The ExpiryQueue below is a heap of items that each expire at a given time. Unlike the
+events of the scheduler, an item can be taken out of the queue before it expires: The
+queue keeps track of the position of every item in the heap, so that cancelling an
+item only moves the items on its way to the top or bottom of the heap.
+"""
+
+import heapq
+import itertools
+
+class Scheduler (object):
+        def __init__(self):
+                self.queue = []
+                self.counter = itertools.count() #Breaks ties between events due at the same time
+
+        def __len__(self):
+                return len(self.queue)
+
+        #Calls function(*args) as the scheduler is run at or after the given time.
+        def at(self, when, function, *args):
+                heapq.heappush(self.queue, (when, next(self.counter), function, args))
+
+        #The time of the next pending event, or None if there is none.
+        def next_time(self):
+                if self.queue:
+                        return self.queue[0][0]
+                return None
+
+        #Calls all functions that are due at the given time, including those scheduled
+        #by the functions themselves.
+        def run(self, now):
+                queue = self.queue
+                while queue and queue[0][0] <= now:
+                        when, n, function, args = heapq.heappop(queue)
+                        function(*args)
+
+        def clear(self):
+                self.queue = []
+
+class ExpiryQueue (object):
+        def __init__(self):
+                self.heap = [] #[when, counter, item] entries, ordered by when and counter
+                self.position = {} #Maps each item to the index of its entry in the heap
+                self.counter = itertools.count()
+
+        def __len__(self):
+                return len(self.heap)
+
+        def __contains__(self, item):
+                return item in self.position
+
+        def push(self, item, when):
+                entry = [when, next(self.counter), item]
+                self.heap.append(entry)
+                self.position[item] = len(self.heap) - 1
+                self.sift_up(len(self.heap) - 1)
+
+        #Takes the item out of the queue. Returns False if it was not in the queue.
+        def cancel(self, item):
+                i = self.position.pop(item, None)
+                if i is None:
+                        return False
+                heap = self.heap
+                last = heap.pop()
+                if i < len(heap):
+                        heap[i] = last
+                        self.position[last[2]] = i
+                        self.sift_up(i)
+                        self.sift_down(self.position[last[2]])
+                return True
+
+        #Takes the items that have expired by the given time (that is, whose time of expiry
+        #lies before it) out of the queue, and returns them in the order they expired.
+        def pop_due(self, now):
+                heap = self.heap
+                due = []
+                while heap and heap[0][0] < now:
+                        item = heap[0][2]
+                        self.cancel(item)
+                        due.append(item)
+                return due
+
+        def clear(self):
+                self.heap = []
+                self.position = {}
+
+        def swap(self, i, j):
+                heap = self.heap
+                heap[i], heap[j] = heap[j], heap[i]
+                self.position[heap[i][2]] = i
+                self.position[heap[j][2]] = j
+
+        def sift_up(self, i):
+                heap = self.heap
+                while i > 0:
+                        parent = (i - 1) // 2
+                        if heap[i][:2] < heap[parent][:2]:
+                                self.swap(i, parent)
+                                i = parent
+                        else:
+                                break
+
+        def sift_down(self, i):
+                heap = self.heap
+                n = len(heap)
+                while True:
+                        smallest = i
+                        for child in (2 * i + 1, 2 * i + 2):
+                                if child < n and heap[child][:2] < heap[smallest][:2]:
+                                        smallest = child
+                        if smallest == i:
+                                break
+                        self.swap(i, smallest)
+                        i = smallest
@@ -0,0 +1,149 @@
+"""
+A history of every finished game, kept in a local SQLite database.
+
+Games are only ever added to the history. Each game is stored with its score, its
+duration in seconds, the number of bees killed, pickups collected and lives lost, and
+its seed (so that it can be told apart from other games with the same score).
+
+Nothing read from the history scans every game. The top scores come from an index on
+the score. Along with every new game, the best score of its day and the number of
+games with its score are updated in the tables days and score_counts, from which the
+daily bests, percentiles and ranks are read. A one-row summary (number of games,
+best score, total score and last score) is updated as well, which lets the start
+menu open instantly no matter how many games have been played.
+
+Games are recorded by a thread of the history, which takes them from a queue in the
+order they were played, so that the update loop never waits for the database. Closing
+the history records the games still in the queue first.
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS games (
+        id INTEGER PRIMARY KEY,
+        played_at REAL NOT NULL,
+        day TEXT NOT NULL,
+        score INTEGER NOT NULL,
+        duration REAL NOT NULL,
+        bees_killed INTEGER NOT NULL,
+        pickups_collected INTEGER NOT NULL,
+        lives_lost INTEGER NOT NULL,
+        seed INTEGER
+);
+CREATE INDEX IF NOT EXISTS games_by_score ON games (score);
+CREATE TABLE IF NOT EXISTS days (
+        day TEXT PRIMARY KEY,
+        games INTEGER NOT NULL,
+        best INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS score_counts (
+        score INTEGER PRIMARY KEY,
+        games INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS summary (
+        id INTEGER PRIMARY KEY CHECK (id = 0),
+        games INTEGER NOT NULL,
+        best INTEGER NOT NULL,
+        total INTEGER NOT NULL,
+        last INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO summary VALUES (0, 0, 0, 0, 0);
+'''
+
+class ScoreHistory (object):
+        def __init__(self, path='.beehive_scores.db'):
+                self.db = sqlite3.connect(path, check_same_thread=False)
+                self.lock = threading.Lock()
+                with self.lock, self.db:
+                        self.db.executescript(SCHEMA)
+                self.summary = self.read_summary()
+                self.queue = queue.Queue() #The rows of the games to be recorded, and None to stop
+                self.errors = []
+                self.thread = threading.Thread(target=self.run, name='ScoreHistory')
+                self.thread.daemon = True
+                self.thread.start()
+
+        def read_summary(self):
+                with self.lock:
+                        games, best, total, last = self.db.execute('SELECT games, best, total, last FROM summary').fetchone()
+                return {'games': games, 'best': best, 'total': total, 'last': last}
+
+        #Adds a finished game to the history, and returns the updated summary. The summary
+        #in memory is updated right away, the database in the background unless wait is set.
+        def record(self, score, duration, bees_killed=0, pickups_collected=0, lives_lost=0, seed=None, wait=False):
+                s = self.summary
+                self.summary = {'games': s['games'] + 1, 'best': max(s['best'], score), 'total': s['total'] + score, 'last': score}
+
+                row = (time.time(), time.strftime('%Y-%m-%d'), score, duration, bees_killed, pickups_collected, lives_lost, seed)
+                if wait:
+                        self.insert(row)
+                else:
+                        self.queue.put(row)
+                return self.summary
+
+        def run(self):
+                while True:
+                        row = self.queue.get()
+                        try:
+                                if row is None:
+                                        break
+                                self.insert(row)
+                        except Exception as e:
+                                self.errors.append((row, e))
+                        finally:
+                                self.queue.task_done()
+
+        #Waits until the games in the queue have been recorded.
+        def wait(self):
+                self.queue.join()
+
+        def insert(self, row):
+                with self.lock, self.db:
+                        self.db.execute('INSERT INTO games (played_at, day, score, duration, bees_killed, pickups_collected, lives_lost, seed) VALUES (?, ?, ?, ?, ?, ?, ?, ?)', row)
+                        day, score = row[1], row[2]
+                        self.db.execute('UPDATE summary SET games = games + 1, best = MAX(best, ?), total = total + ?, last = ?', (score, score, score))
+                        self.db.execute('INSERT OR IGNORE INTO days VALUES (?, 0, ?)', (day, score))
+                        self.db.execute('UPDATE days SET games = games + 1, best = MAX(best, ?) WHERE day = ?', (score, day))
+                        self.db.execute('INSERT OR IGNORE INTO score_counts VALUES (?, 0)', (score,))
+                        self.db.execute('UPDATE score_counts SET games = games + 1 WHERE score = ?', (score,))
+
+        def query(self, sql, args=()):
+                with self.lock:
+                        return self.db.execute(sql, args).fetchall()
+
+        #The n best games, as (score, duration, day) tuples.
+        def top(self, n=10):
+                return self.query('SELECT score, duration, day FROM games ORDER BY score DESC LIMIT ?', (n,))
+
+        #The best score of each of the last given number of days on which games were played.
+        def daily_bests(self, days=7):
+                return self.query('SELECT day, best FROM days ORDER BY day DESC LIMIT ?', (days,))
+
+        #The score below which the given fraction of all games lie. This walks the distinct
+        #scores, of which there are far fewer than games.
+        def percentile(self, p):
+                counts = self.query('SELECT score, games FROM score_counts ORDER BY score')
+                games = sum(n for score, n in counts)
+                target = min(games - 1, int(p * games))
+                seen = 0
+                for score, n in counts:
+                        seen += n
+                        if seen > target:
+                                return score
+                return 0
+
+        #The fraction of all games with a lower score than the given one.
+        def rank(self, score):
+                below, games = self.query('SELECT TOTAL(CASE WHEN score < ? THEN games END), TOTAL(games) FROM score_counts', (score,))[0]
+                return below / games if games else 0
+
+        #Records the games still in the queue, and closes the database.
+        def close(self, timeout=None):
+                self.queue.put(None)
+                self.thread.join(timeout)
+                with self.lock:
+                        self.db.close()
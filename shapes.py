@@ -0,0 +1,48 @@
+"""
+A cache of the oval paths used for the bees and the player.
+
+The bees change their size for every step while they enter the hive and while they
+die, and building a new ui.Path for each of those steps is costly when many bees are
+born or killed at the same time. The cache rounds the requested diameter to a
+multiple of a small quantum and hands out the same path to every node asking for a
+diameter that rounds the same way. The least recently used paths are evicted once
+the cache is full.
+"""
+
+from collections import OrderedDict
+import ui
+
+class OvalCache (object):
+        def __init__(self, quantum=0.5, capacity=256):
+                self.quantum = quantum #The diameters are rounded to multiples of this, in points
+                self.capacity = capacity
+                self.paths = OrderedDict()
+                self.hits = 0
+                self.misses = 0
+
+        def __len__(self):
+                return len(self.paths)
+
+        def quantize(self, diameter):
+                q = self.quantum
+                return round(diameter / q) * q
+
+        #Returns a path for a circle with (approximately) the given diameter.
+        def get(self, diameter):
+                d = self.quantize(diameter)
+                path = self.paths.get(d)
+                if path is None:
+                        self.misses += 1
+                        path = self.paths[d] = ui.Path.oval(0, 0, d, d)
+                        if len(self.paths) > self.capacity:
+                                self.paths.popitem(last=False)
+                else:
+                        self.hits += 1
+                        self.paths.move_to_end(d)
+                return path
+
+        def clear(self):
+                self.paths.clear()
+
+#The cache shared by all nodes in the game.
+ovals = OvalCache()
@@ -0,0 +1,736 @@
+"""
+The simulation core of BeeHive.
+
+Everything that makes up the state of a game - the player, the enemy bees, the
+honeycombs and power-ups, and the timers for the buzzing and thunder - lives here,
+without any reference to Pythonista's scene, ui or sound modules. The world is
+advanced in fixed ticks, 60 per second unless it is given another tick rate, no
+matter how often the screen is updated, and reports what happened during the ticks
+as a list of events. The Game scene in BeeHive.py uses these events to
+play sounds and run animations, and mirrors the state of the world into nodes.
+
+Since nothing in this module depends on the renderer, the game loop can be run
+(and profiled) on any machine with a plain Python installation.
+"""
+
+import math
+import random
+from array import array
+from collections import namedtuple
+from profiler import NullProfiler
+from scheduler import Scheduler, ExpiryQueue
+from spatial import SpatialHash
+from collision import Hitboxes, player_hits
+
+#The following constants determine the basic game parameters for the bees and the power-ups.
+
+PLAYERLIVES = 3
+
+BEESPEED = 1 #Determines the amount with which the enemy bees change their speed at a given time step
+BEEFREQUENCY = 4 #Determines how often a new enemy bee appears
+
+FLOWERFREQUENCY = 40 #Determines how often a new flower appears
+HONEYCOMBFREQUENCY = 6 #Determines how often a new honeycomb appears
+HEARTFREQUENCY = 90 #Determines how often a new heart appears
+LIGHTNINGFREQUENCY = 90 #Determines how often a new lightning appears
+MUSHROOMFREQUENCY = 100 #Determines how often a new mushroom appears
+
+#The parameters of a world. The constants above are the defaults, and a world can be given
+#other parameters (for example by batch.py, to tune the difficulty of the game) with
+#DEFAULTS._replace(bee_frequency=3).
+Parameters = namedtuple('Parameters', 'player_lives bee_speed bee_frequency flower_frequency honeycomb_frequency heart_frequency lightning_frequency mushroom_frequency')
+DEFAULTS = Parameters(PLAYERLIVES, BEESPEED, BEEFREQUENCY, FLOWERFREQUENCY, HONEYCOMBFREQUENCY, HEARTFREQUENCY, LIGHTNINGFREQUENCY, MUSHROOMFREQUENCY)
+
+#The kinds of pickups that can appear in the hive.
+FLOWER = 'flower'
+HONEYCOMB = 'honeycomb'
+HEART = 'heart'
+LIGHTNING = 'lightning'
+MUSHROOM = 'mushroom'
+
+#The width of each kind of pickup, as used when checking for collisions with the player,
+#and the number of seconds a pickup stays in the hive if it is not picked up.
+PICKUP_SIZE = {FLOWER: 9, HONEYCOMB: 12, HEART: 15, LIGHTNING: 15, MUSHROOM: 35}
+PICKUP_LIFETIME = {FLOWER: 3, HONEYCOMB: 5, HEART: 5, LIGHTNING: 5, MUSHROOM: 5}
+
+#The kinds in the order of their codes in a PickupStore.
+KINDS = (FLOWER, HONEYCOMB, HEART, LIGHTNING, MUSHROOM)
+KIND_CODES = {kind: code for code, kind in enumerate(KINDS)}
+
+#The radius of the pickups of each kind, by their codes (see collision.py).
+PICKUP_RADII = tuple(0.5 * PICKUP_SIZE[kind] for kind in KINDS)
+
+#The effect of collecting a pickup: The points scored, the lives and thunderbolts gained,
+#whether the attack mode is started and the factor by which the player is resized. The
+#resizing of a pickup that starts the attack mode lasts as long as the attack mode.
+Effect = namedtuple('Effect', 'score lives thunderbolts attack resize')
+
+#The effect of each kind of pickup, and of each colour of flower.
+EFFECTS = {
+        (FLOWER, 'white'): Effect(score=0, lives=0, thunderbolts=0, attack=True, resize=1),
+        (FLOWER, 'rot'): Effect(score=0, lives=0, thunderbolts=0, attack=True, resize=2),
+        (HONEYCOMB, None): Effect(score=1, lives=0, thunderbolts=0, attack=False, resize=1),
+        (HEART, None): Effect(score=0, lives=1, thunderbolts=0, attack=False, resize=1),
+        (LIGHTNING, None): Effect(score=0, lives=0, thunderbolts=1, attack=False, resize=1),
+        (MUSHROOM, None): Effect(score=0, lives=0, thunderbolts=0, attack=False, resize=0.5),
+}
+
+#The duration (in seconds) of the immunity after a collision, of the attack mode after
+#a flower has been collected and of the fading of the player after it has died.
+IMMUNITY_TIME = 3.5
+ATTACK_TIME = 7
+DEATH_TIME = 1
+
+#The rate (in ticks per second) for which the movements in the hive were made, and the
+#rate at which the enemy bees change their velocity. A world running at another tick
+#rate scales the movements of each tick accordingly.
+TICK_RATE = 60
+WALK_RATE = 30
+
+#The most ticks run for a single frame. When the frames take longer than this, the game
+#slows down rather than falling further and further behind.
+MAX_TICKS = 5
+
+#The shapes in the hive are drawn with an outline, which makes them one point wider
+#than their diameter.
+OUTLINE = 1
+
+#The state of an enemy bee. The size of the bee is given by its age, which is increased
+#as it enters the hive and decreased as it dies. The radius used for collisions is kept
+#up to date as the age changes.
+class BeeState (object):
+        kind = 'bee'
+
+        def __init__(self, x, y, fully_grown):
+                self.x = x
+                self.y = y
+                self.px = x #The position at the start of the last tick, see World.advance
+                self.py = y
+                self.age = 0
+                self.speedup = 0
+                self.speedright = 0
+                self.fully_grown = fully_grown
+                self.inHive = False
+                self.dying = False
+                self.dead = False
+
+        @property
+        def age(self):
+                return self._age
+
+        @age.setter
+        def age(self, age):
+                self._age = age
+                self.radius = 0.05 * age + 0.5 * OUTLINE
+
+        @property
+        def size(self):
+                return 2 * self.radius
+
+        #This function controls how the enemy bees enter the hive. The bees grow gradually
+        #to their fully grown size. This size is increased with time: Every 240 seconds,
+        #another multiple of fully_grown is added to the size of the new-born bees. The
+        #bees grow by k each tick (see World.scale).
+        def enter(self, t, k=1):
+                if not self.inHive:
+                        target = int((1 + (t / 240)) * self.fully_grown)
+                        if self.age < target:
+                                self.age = min(self.age + k, target)
+                        else:
+                                self.inHive = True
+
+        #This function controls the movement of the enemy bees. WALK_RATE times per second, they change their
+        #velocity in a random fashion, dictated by beeSpeed (BEESPEED by default), and move stride times their velocity.
+        #The function makes sure the bees do not exceed their speed limit, and that they do not move out of bounds.
+        def move(self, rng, stride, width, height, beeSpeedLimit, beeSpeed=BEESPEED):
+                if self.inHive and not self.dead:
+                        v = self.speedright
+                        w = self.speedup
+
+                        if v > beeSpeedLimit:
+                                v -= rng.randint(0, beeSpeed)
+                        elif v < - beeSpeedLimit:
+                                v += rng.randint(0,beeSpeed)
+                        else:
+                                v += rng.randint(-beeSpeed, beeSpeed)
+
+                        if (self.x < 0) and (v < 0):
+                                v = -v
+                        elif (self.x > width) and (v > 0):
+                                v = -v
+
+                        if w > beeSpeedLimit:
+                                w -= rng.randint(0, beeSpeed)
+                        elif w < - beeSpeedLimit:
+                                w += rng.randint(0,beeSpeed)
+                        else:
+                                w += rng.randint(-beeSpeed, beeSpeed)
+
+                        if (self.y < 0) and (w < 0):
+                                w = -w
+                        elif (self.y > height) and (w > 0):
+                                w = -w
+
+                        self.speedright = v
+                        self.speedup = w
+                        self.x += stride * v
+                        self.y += stride * w
+
+        #This function controls the dying of the enemey bees when they get hit by the
+        #player with a flower power-up. When this happens, the enemy bee goes into a
+        #tail spin and drops to the floor of the hive, losing k of its age each tick. Returns
+        #True for the step in which the bee hits the floor.
+        def die(self, k=1):
+                if self.dying:
+                        r = self.age
+                        if r > 90:
+                                c1, c2 = tail_spin(r, self.fully_grown, k)
+                                self.x += c1
+                                self.y += c2
+                                self.age = max(90, r - k)
+                        if r == 90:
+                                self.dead = True
+                                return True
+                return False
+
+#The state of the player. Like that of a bee, its size is given by its age.
+class PlayerState (object):
+        def __init__(self, x, y):
+                self.x = x
+                self.y = y
+                self.px = x
+                self.py = y
+                self.honeycombscollected = 0
+                self.diameter = 20
+                self.age = 200 #Adapted from BeeState
+                self.fully_grown = 200 #Adapted from BeeState
+                self.immune = False
+                self.attack = False
+                #The times at which the immunity, the attack mode and the doubled size of a red
+                #flower (the giant mode) end. A flower collected during the attack mode extends it.
+                self.immune_until = 0
+                self.attack_until = 0
+                self.giant_until = 0
+                self.dying = False
+                self.half_dead = False
+                self.dead = False
+
+        @property
+        def age(self):
+                return self._age
+
+        @age.setter
+        def age(self, age):
+                self._age = age
+                self.radius = 0.05 * age + 0.5 * OUTLINE
+
+        @property
+        def size(self):
+                return 2 * self.radius
+
+        #This function changes the size of the player as need in connection with
+        #the honeycombs, the mushroom and the red flower power-up.
+        def change_size(self, factor):
+                self.diameter *= factor
+                self.update_size()
+
+        def grow(self, amount):
+                self.diameter += amount
+                self.update_size()
+
+        #Relates the age and fully_grown attributes. This is used for the die method,
+        #to keep track of the size of the player as it dies.
+        def update_size(self):
+                self.age = 10 * self.diameter
+                self.fully_grown = self.age
+
+        #This function controls the death of the player, after it has run out of lives.
+        #Adapted from the correspoding function for the enemy bees above. Returns True
+        #for the step in which the player hits the floor.
+        def die(self, k=1):
+                if self.dying:
+                        r = self.age
+                        if r > 90:
+                                c1, c2 = tail_spin(r, self.fully_grown, k)
+                                self.x += c1
+                                self.y += c2
+                                self.age = max(90, r - k)
+                        if 0 < r <= 90:
+                                self.half_dead = True
+                                self.age = 0
+                                return True
+                return False
+
+#A honeycomb or power-up lying in the hive. Flowers come in two colours, 'white' and 'rot'.
+#The index is the row of the pickup in the PickupStore holding it, or -1 once it has been
+#collected or has expired.
+class Pickup (object):
+        __slots__ = ('kind', 'x', 'y', 'birthtime', 'farbe', 'size', 'radius', 'lifetime', 'index')
+
+        def __init__(self, kind, x, y, birthtime, farbe=None):
+                self.kind = kind
+                self.x = x
+                self.y = y
+                self.birthtime = birthtime
+                self.farbe = farbe
+                self.size = PICKUP_SIZE[kind]
+                self.radius = 0.5 * self.size
+                self.lifetime = PICKUP_LIFETIME[kind]
+                self.index = -1
+
+#The pickups lying in the hive. The kind and position of each pickup are kept in one
+#row of flat typed arrays, and the Pickup objects themselves in a list of the same order. A
+#pickup is removed by moving the last row into its place, so that no other row needs to be
+#moved. The pickups are also kept in a queue ordered by their time of expiry, so finding the
+#expired pickups only looks at those that have actually expired, and removing a collected
+#pickup takes it out of the queue in O(log n).
+class PickupStore (object):
+        def __init__(self):
+                self.items = []
+                self.kind = array('B')
+                self.x = array('d')
+                self.y = array('d')
+                self.expiry = ExpiryQueue()
+
+        def __len__(self):
+                return len(self.items)
+
+        def __iter__(self):
+                return iter(self.items)
+
+        def add(self, pickup):
+                pickup.index = len(self.items)
+                self.items.append(pickup)
+                self.kind.append(KIND_CODES[pickup.kind])
+                self.x.append(pickup.x)
+                self.y.append(pickup.y)
+                self.expiry.push(pickup, pickup.birthtime + pickup.lifetime)
+                return pickup
+
+        def remove(self, pickup):
+                i = pickup.index
+                last = len(self.items) - 1
+                if i != last:
+                        moved = self.items[last]
+                        moved.index = i
+                        self.items[i] = moved
+                        for column in (self.kind, self.x, self.y):
+                                column[i] = column[last]
+                self.items.pop()
+                for column in (self.kind, self.x, self.y):
+                        column.pop()
+                self.expiry.cancel(pickup)
+                pickup.index = -1
+
+        #Returns the pickups whose lifetime has run out by the time t, and takes them out of
+        #the expiry queue.
+        def expired(self, t):
+                return self.expiry.pop_due(t)
+
+#The displacement of a dying bee (or player) of the given age during one step of its tail spin,
+#in which its age goes down by k.
+def tail_spin(r, fully_grown, k=1):
+        s = 0.5 * r / fully_grown
+        radius = s * 12
+        angle1 = (r / 15) * 2 * 3.14
+        angle2 = ((r + k) / 15) * 2 * 3.14
+
+        c1 = radius * (math.cos(angle2) - math.cos(angle1))
+        c2 = radius * (math.sin(angle2) - math.sin(angle1))
+        return c1, c2
+
+#The enemy bees of a world. Each step, the bees enter the hive and move, one bee at a
+#time, after which the dying bees (which are kept in a list of their own, so a step only
+#looks at the bees that are actually dying) go on with their tail spin. The bees are kept
+#in a grid so that the player is only checked against the bees in its neighbourhood. A
+#swarm with the same interface that moves all of the bees in one batch can be found in
+#swarm.py.
+class Swarm (object):
+        def __init__(self, world):
+                self.world = world
+                self.bees = []
+                self.dying = []
+                self.grid = SpatialHash()
+
+        def spawn(self, x, y, fully_grown):
+                bee = BeeState(x, y, fully_grown)
+                self.bees.append(bee)
+                self.grid.insert(bee)
+                return bee
+
+        #Advances all bees by one step and returns the bees that hit the floor of the
+        #hive during the step. These are removed from the swarm.
+        def step(self):
+                w = self.world
+                walking = w.time % w.walk_every == 0
+                dead = []
+
+                for bee in self.bees:
+                        bee.px = bee.x
+                        bee.py = bee.y
+                        bee.enter(w.t, w.scale)
+                        if walking:
+                                bee.move(w.random, w.stride, w.width, w.height, w.speed_limit, w.params.bee_speed)
+                        if not bee.dying:
+                                self.grid.move(bee)
+
+                for bee in self.dying:
+                        if bee.die(w.scale):
+                                dead.append(bee)
+                        else:
+                                self.grid.move(bee)
+
+                #The lists are filtered in place, since the world holds on to self.bees.
+                if dead:
+                        self.bees[:] = [bee for bee in self.bees if not bee.dead]
+                        self.dying[:] = [bee for bee in self.dying if not bee.dead]
+                        for bee in dead:
+                                self.grid.remove(bee)
+                return dead
+
+        #Lets the bee go into its tail spin.
+        def kill(self, bee):
+                bee.dying = True
+                self.dying.append(bee)
+
+        #Returns the bees which may overlap the given entity.
+        def near(self, entity):
+                return self.grid.neighbours(entity)
+
+#The world of a single game. Each call to step() advances the world by one tick and returns
+#the events of that tick as a list of (name, entity) pairs, where the entity of the
+#bees_killed and bees_dead events is the list of all bees killed by the player, or hitting
+#the floor, during the tick. The update loop calls advance() instead, which runs as many
+#ticks as fit into the time since the last frame. The swarm
+#argument is the class used for the enemy bees, tick_rate the number of ticks per second and
+#params the Parameters of the game.
+#
+#All randomness in the world is drawn from a random number generator of its own, seeded
+#at the start of each game. Given the seed, a game plays out the same way every time it
+#is fed the same inputs (see replay.py).
+class World (object):
+        def __init__(self, width, height, swarm=Swarm, seed=None, tick_rate=TICK_RATE, params=DEFAULTS):
+                self.width = width
+                self.height = height
+                self.swarm_class = swarm
+                self.params = params
+
+                #The length of a tick in seconds, and the number of steps at TICK_RATE each tick stands
+                #for. The bees change their velocity every walk_every ticks, and move stride times their
+                #velocity as they do.
+                self.tick_rate = tick_rate
+                self.tick = 1 / tick_rate
+                self.scale = TICK_RATE / tick_rate
+                self.walk_every = max(1, round(tick_rate / WALK_RATE))
+                self.stride = self.walk_every * WALK_RATE / tick_rate
+
+                self.profiler = NullProfiler() #Times the stages of each step, see profiler.py
+                self.new_game(seed)
+
+        #Resets all variables as a new game is being started. Without a seed, the game gets
+        #a random one, which is kept in self.seed.
+        def new_game(self, seed=None):
+                if seed is None:
+                        seed = random.getrandbits(63)
+                self.seed = seed
+                self.random = random.Random(seed)
+
+                self.t = 0 #Time in seconds since the game started
+                self.time = 0 #Increased by one for each tick
+                self.accumulator = 0 #The time since the last frame that has not yet been ticked
+                self.alpha = 0 #How far the frame lies between the last two ticks, see advance
+                self.speed_limit = 3 #The speed limit of the enemy bees
+                self.buzzing = False #Keeps track of whether the enemy bees have been stirred or not
+                self.time_last_buzz = 0
+                self.thunder = False #Keeps track of whether the enemy bees have been struck by a lightning power-up
+                self.time_last_thunder = 0
+
+                self.player = PlayerState(self.width / 2, self.height / 2)
+
+                #The enemy bees, and the store of the honeycombs and power-ups.
+                self.swarm = self.swarm_class(self)
+                self.bees = self.swarm.bees
+                self.pickups = PickupStore()
+                self.thunderbolts = 0 #The number of lightnings in the player's possession
+
+                #The reach of the player to the pickups, and the entities it has hit this tick.
+                self.hitboxes = Hitboxes(PICKUP_RADII)
+                self.hits = []
+                self.kills = [] #The bees killed by the player this tick, see bee_collision
+
+                self.score = 0
+                self.lives = self.params.player_lives
+                self.over = False
+
+                #Statistics of the game, kept for the score history.
+                self.bees_killed = 0
+                self.pickups_collected = 0
+                self.lives_lost = 0
+
+                self.events = []
+
+                #The scheduler of the timed events, such as the births of the bees and pickups. 
+                self.scheduler = Scheduler()
+                self.scheduler.at(1, self.spawn_bee, 1)
+                params = self.params
+                self.add_spawner(params.flower_frequency, self.grow_flower)
+                self.add_spawner(params.honeycomb_frequency, self.add_pickup, HONEYCOMB)
+                self.add_spawner(params.heart_frequency, self.add_pickup, HEART)
+                self.add_spawner(params.lightning_frequency, self.add_pickup, LIGHTNING)
+                self.add_spawner(params.mushroom_frequency, self.add_pickup, MUSHROOM)
+
+        #Advances the world by the time dt since the last frame, in as many whole ticks as fit
+        #into it (but no more than MAX_TICKS), with (u, v) being the current velocity of the player
+        #(see update_player). The time left over is carried to the next frame, and self.alpha
+        #is set to the fraction of a tick it makes up: Drawing each entity at alpha of the way
+        #from (px, py) to (x, y) keeps the movements smooth at any frame rate.
+        def advance(self, dt, u, v):
+                events = []
+                self.accumulator += dt
+                ticks = 0
+                #A frame of exactly one tick may come out a hair shorter as it is rounded.
+                while self.accumulator > 0.999 * self.tick and not self.over:
+                        if ticks == MAX_TICKS:
+                                self.accumulator = 0
+                                break
+                        self.accumulator -= self.tick
+                        events += self.step(self.tick, u, v)
+                        ticks += 1
+                self.alpha = max(0, min(1, self.accumulator / self.tick))
+                return events
+
+        #Advances the world by one tick of dt seconds, with (u, v) being the current velocity
+        #of the player.
+        def step(self, dt, u, v):
+                if not self.over:
+                        p = self.profiler
+                        self.t += dt
+                        self.player.px = self.player.x
+                        self.player.py = self.player.y
+                        self.update_player(u, v)
+                        p.lap('input')
+                        self.check_buzz()
+                        self.check_thunder()
+                        p.lap('timers')
+                        self.scheduler.run(self.t)
+                        p.lap('spawning')
+                        self.check_lives()
+
+                        if self.player.die(self.scale):
+                                self.emit('player_half_dead', self.player)
+                                self.later(DEATH_TIME, self.change_death)
+
+                        dead = self.swarm.step()
+                        if dead:
+                                self.emit('bees_dead', dead)
+                        p.lap('bees')
+
+                        player_hits(self.player, self.swarm.near(self.player), self.pickups, self.hitboxes, self.hits)
+                        p.lap('collisions')
+
+                        for entity in self.hits:
+                                self.on_hit[entity.kind](self, entity)
+                        if self.kills:
+                                self.emit('bees_killed', self.kills)
+                                self.kills = []
+                        p.lap('pickups')
+                        self.expire_pickups()
+                        p.lap('expiry')
+
+                        self.time += 1
+
+                events = self.events
+                self.events = []
+                return events
+
+        def emit(self, name, entity=None):
+                self.events.append((name, entity))
+
+        #Calls the given function after the given number of seconds.
+        def later(self, delay, function, *args):
+                self.scheduler.at(self.t + delay, function, *args)
+
+        #Registers a function that is called once in every time window of frequency seconds,
+        #at a random whole second within the window. This is how the honeycombs and power-ups
+        #appear in the hive.
+        def add_spawner(self, frequency, function, *args):
+                self.scheduler.at(0, self.open_window, 0, frequency, function, args)
+
+        #Draws the time of birth within the window starting at the given time, and schedules
+        #the next window. The time of birth is drawn from 1 to frequency, where the last value
+        #means that nothing is born in the window.
+        def open_window(self, start, frequency, function, args):
+                birth = self.random.randint(1, frequency)
+                if birth < frequency:
+                        self.scheduler.at(start + birth, function, *args)
+                self.scheduler.at(start + frequency, self.open_window, start + frequency, frequency, function, args)
+
+        #Moves the player with the velocity (u, v), given as fractions of the max speed applying
+        #horizontally and vertically, as worked out from the phone's tilt by tilt.TiltInput (or
+        #by a controller). The player cannot move out of the bounds of the screen.
+        def update_player(self, u, v):
+                if not self.player.half_dead:
+                        max_speed = 10 * self.scale
+                        x = self.player.x + max(-1, min(1, u)) * max_speed
+                        y = self.player.y + max(-1, min(1, v)) * max_speed
+
+                        self.player.x = max(0, min(self.width, x + self.scale * self.random.randint(-1, 1)))
+                        self.player.y = max(0, min(self.height, y + self.scale * self.random.randint(-1, 1)))
+
+        def check_lives(self):
+                if self.player.dead:
+                        self.over = True
+                        self.emit('game_over', self.player)
+
+        def change_death(self):
+                self.player.dead = True
+
+        #When the player is immune, he is not harmed by the enemy bees. The immunity ends once
+        #its time is up.
+        def end_immunity(self):
+                if self.t >= self.player.immune_until:
+                        self.player.immune = False
+
+        #When the player is in attack mode, it can kill off the enemy bees. The attack mode ends
+        #once its time is up, unless it has been extended by another flower in the meantime.
+        def end_attack(self):
+                if self.t >= self.player.attack_until:
+                        self.player.attack = False
+
+        def resize_player(self, factor):
+                self.player.change_size(factor)
+                self.emit('player_resized', self.player)
+
+        #Picks a random position at least 50 points from the edges of the hive.
+        def random_position(self):
+                r = self.random.randint(50, int(self.width) - 50)
+                s = self.random.randint(50, int(self.height) - 50)
+                return r, s
+
+        def add_pickup(self, kind, farbe=None):
+                r, s = self.random_position()
+                self.put_pickup(Pickup(kind, r, s, self.t, farbe))
+
+        def put_pickup(self, pickup):
+                self.pickups.add(pickup)
+                self.emit('pickup_spawned', pickup)
+
+        #Creates a new bee, due at the given time, and schedules the birth of the next one. 
+        #How often this happens (in seconds) is controlled by the bee_frequency parameter. 
+        def spawn_bee(self, when):
+                r = self.random.choice([50, self.width - 50])
+                s = self.random.choice([50, self.height - 50])
+                bee = self.swarm.spawn(r, s, self.random.randint(150, 250))
+                self.emit('bee_spawned', bee)
+                frequency = self.params.bee_frequency
+                self.scheduler.at(when + frequency, self.spawn_bee, when + frequency)
+
+        #Forms a flower power-up. One in four flowers are red, the rest are white. 
+        def grow_flower(self):
+                if self.random.randint(1, 4) == 1:
+                        self.add_pickup(FLOWER, 'rot')
+                else:
+                        self.add_pickup(FLOWER, 'white')
+
+        #The enemy bees fly at increased speed for five seconds when provoked.
+        def check_buzz(self):
+                if self.buzzing and self.t - self.time_last_buzz > 5:
+                        self.speed_limit = 3
+                        self.buzzing = False
+
+        #The enemy bees are pacified for 7 seconds when hit by lightning.
+        def check_thunder(self):
+                if self.thunder and self.t - self.time_last_thunder > 7:
+                        self.speed_limit = 3
+                        self.thunder = False
+
+        #This method handles a collision of the player with an enemy bee. If the player is in attack mode (and the enemy
+        #bee has fully entered the hive, and is not dying), then the enemy bee dies. The bees killed during a tick are
+        #reported in a single bees_killed event. Otherwise, if the player is not immune,
+        #and the enemy bee is not dying, then the player loses a life and the enemy bees get stirred and so move faster
+        #for a limited period of time.
+        def bee_collision(self, bee):
+                if bee.dying:
+                        return
+                if self.player.attack:
+                        if bee.inHive:
+                                self.swarm.kill(bee)
+                                self.bees_killed += 1
+                                self.kills.append(bee)
+                elif not self.player.immune:
+                        if self.lives > 0:
+                                self.lives -= 1
+                                self.lives_lost += 1
+                                if self.lives > 0:
+                                        self.speed_limit = 10
+                                        self.buzzing = True
+                                        self.time_last_buzz = self.t
+                                        self.player.immune = True
+                                        self.player.immune_until = self.t + IMMUNITY_TIME
+                                        self.later(IMMUNITY_TIME, self.end_immunity)
+                                        self.emit('player_hit', self.player)
+                                if self.lives == 0:
+                                        self.player.dying = True
+                                        self.emit('player_dying', self.player)
+
+        def remove_pickup(self, pickup):
+                self.pickups.remove(pickup)
+
+        #Handles a collision of the player with a pickup, and applies its effect.
+        def pickup_collision(self, pickup):
+                self.remove_pickup(pickup)
+                self.collect(pickup)
+                self.emit('pickup_collected', pickup)
+
+        #Removes the pickups that have not been picked up within their lifetime. 
+        def expire_pickups(self):
+                for pickup in self.pickups.expired(self.t):
+                        self.remove_pickup(pickup)
+                        self.emit('pickup_expired', pickup)
+
+        #Applies the effect of a collected pickup, as given by EFFECTS.
+        def collect(self, pickup):
+                effect = EFFECTS[pickup.kind, pickup.farbe]
+                self.pickups_collected += 1
+
+                #A flower initiates the attack mode, and a red flower also doubles the size of the
+                #player for as long as the attack mode lasts. A mushroom halves the size of the player.
+                if effect.attack:
+                        self.player.attack = True
+                        self.player.attack_until = self.t + ATTACK_TIME
+                if effect.resize != 1:
+                        self.resize_player(effect.resize)
+                        if effect.attack:
+                                self.player.giant_until = self.player.attack_until
+                                self.later(ATTACK_TIME, self.resize_player, 1 / effect.resize)
+                if effect.attack:
+                        self.later(ATTACK_TIME, self.end_attack)
+
+                #The score is updated, and for every second honeycomb collected, the player grows in size.
+                if effect.score:
+                        self.player.honeycombscollected += 1
+                        self.score += effect.score
+                        if self.score % 2 == 0:
+                                self.player.grow(2)
+                                self.emit('player_resized', self.player)
+
+                #A heart gives an extra life, and a lightning is kept as a thunderbolt, which can later
+                #be used to release thunder.
+                self.lives += effect.lives
+                self.thunderbolts += effect.thunderbolts
+
+        #When the thunder is released, the enemy bees are pacified, in that their max speed
+        #goes down. Returns False if the player has no thunderbolts left.
+        def release_thunder(self):
+                if self.thunderbolts == 0:
+                        return False
+                self.thunderbolts -= 1
+                self.speed_limit = 0.5
+                self.thunder = True
+                self.time_last_thunder = self.t
+                self.emit('thunder_released')
+                return True
+
+#The handling of a collision of the player with each kind of entity.
+World.on_hit = {kind: World.pickup_collision for kind in KINDS}
+World.on_hit[BeeState.kind] = World.bee_collision
@@ -0,0 +1,218 @@
+"""
+Snapshots of the complete state of a world, from which a game can be resumed.
+
+A snapshot holds everything that makes up a game in progress: the state of the world
+(its timers, score and statistics, the state of its random number generator), the
+player, every bee and every pickup, and the pending events of the scheduler, such as
+the end of the immunity or of the attack mode and the births of the next bees and
+pickups. It is packed with struct into a few kilobytes:
+
+        data = snapshot.dumps(world)
+        world = snapshot.loads(data)
+
+The pending events are stored by the name of the method of the world they call, and
+their arguments by a tag for each type (see pack_value), so no code is stored in the
+file. A restored world emits a bee_spawned event for each bee and a pickup_spawned
+event for each pickup, which lets the Game scene create their nodes.
+
+The NumpySwarm draws its random numbers from a generator of its own, which is seeded
+anew from the world's generator as a snapshot is restored.
+"""
+
+import struct
+from simulation import World, Swarm, Parameters, Pickup, KINDS, KIND_CODES
+
+MAGIC = b'BHSS'
+VERSION = 3
+HEADER = struct.Struct('<4sH')
+
+#The size, tick rate and seed of the world, followed by its parameters.
+SETUP = struct.Struct('<ddHQ%dd' % len(Parameters._fields))
+
+#t, time, accumulator, speed_limit, buzzing, time_last_buzz, thunder, time_last_thunder,
+#score, lives, over, bees_killed, pickups_collected, lives_lost, thunderbolts.
+WORLD = struct.Struct('<dQddBdBd iiBiiiI')
+
+#x, y, px, py, honeycombscollected, diameter, age, fully_grown, immune, attack, dying,
+#half_dead, dead, immune_until, attack_until, giant_until.
+PLAYER = struct.Struct('<ddddiddd5B3d')
+
+#x, y, px, py, age, speedright, speedup, fully_grown, inHive, dying, dead.
+BEE = struct.Struct('<8d3B')
+
+#kind, colour, x, y, birthtime.
+PICKUP = struct.Struct('<BBddd')
+COLOURS = (None, 'white', 'rot')
+
+COUNT = struct.Struct('<I')
+DOUBLE = struct.Struct('<d')
+
+#The state of a random.Random: its version, the 625 words of the Mersenne Twister, and
+#whether (and which) normal variate is kept for the next call to gauss.
+RANDOM = struct.Struct('<B625IBd')
+
+#The tags of the values in the arguments of the pending events.
+FLOAT = b'f'
+INT = b'i'
+TEXT = b's'
+NONE = b'n'
+TUPLE = b't'
+METHOD = b'm'
+
+def pack_text(out, text):
+        data = text.encode('utf-8')
+        out += COUNT.pack(len(data))
+        out += data
+
+def unpack_text(data, offset):
+        n, = COUNT.unpack_from(data, offset)
+        offset += COUNT.size
+        return data[offset:offset + n].decode('utf-8'), offset + n
+
+#Appends a value to out: A number, a string, None, a tuple of values, or a method of the
+#world, which is stored by its name.
+def pack_value(out, value, world):
+        if value is None:
+                out += NONE
+        elif isinstance(value, bool) or isinstance(value, int):
+                out += INT
+                out += struct.pack('<q', value)
+        elif isinstance(value, float):
+                out += FLOAT
+                out += DOUBLE.pack(value)
+        elif isinstance(value, str):
+                out += TEXT
+                pack_text(out, value)
+        elif isinstance(value, tuple):
+                out += TUPLE
+                out += COUNT.pack(len(value))
+                for v in value:
+                        pack_value(out, v, world)
+        elif getattr(value, '__self__', None) is world:
+                out += METHOD
+                pack_text(out, value.__name__)
+        else:
+                raise TypeError('Cannot store %r in a snapshot' % (value,))
+
+def unpack_value(data, offset, world):
+        tag = data[offset:offset + 1]
+        offset += 1
+        if tag == NONE:
+                return None, offset
+        if tag == INT:
+                return struct.unpack_from('<q', data, offset)[0], offset + 8
+        if tag == FLOAT:
+                return DOUBLE.unpack_from(data, offset)[0], offset + DOUBLE.size
+        if tag == TEXT:
+                return unpack_text(data, offset)
+        if tag == TUPLE:
+                n, = COUNT.unpack_from(data, offset)
+                offset += COUNT.size
+                values = []
+                for i in range(n):
+                        value, offset = unpack_value(data, offset, world)
+                        values.append(value)
+                return tuple(values), offset
+        if tag == METHOD:
+                name, offset = unpack_text(data, offset)
+                return getattr(world, name), offset
+        raise ValueError('Unknown tag %r in snapshot' % tag)
+
+#Returns the snapshot of the world as bytes.
+def dumps(world):
+        out = bytearray(HEADER.pack(MAGIC, VERSION))
+        out += SETUP.pack(world.width, world.height, world.tick_rate, world.seed, *world.params)
+        out += WORLD.pack(world.t, world.time, world.accumulator, world.speed_limit, world.buzzing, world.time_last_buzz,
+                world.thunder, world.time_last_thunder,
+                world.score, world.lives, world.over, world.bees_killed, world.pickups_collected, world.lives_lost, world.thunderbolts)
+
+        version, words, gauss = world.random.getstate()
+        out += RANDOM.pack(version, *words, gauss is not None, gauss or 0)
+
+        p = world.player
+        out += PLAYER.pack(p.x, p.y, p.px, p.py, p.honeycombscollected, p.diameter, p.age, p.fully_grown,
+                p.immune, p.attack, p.dying, p.half_dead, p.dead, p.immune_until, p.attack_until, p.giant_until)
+
+        bees = world.bees
+        out += COUNT.pack(len(bees))
+        for b in bees:
+                out += BEE.pack(b.x, b.y, b.px, b.py, b.age, b.speedright, b.speedup, b.fully_grown, b.inHive, b.dying, b.dead)
+
+        out += COUNT.pack(len(world.pickups))
+        for q in world.pickups:
+                out += PICKUP.pack(KIND_CODES[q.kind], COLOURS.index(q.farbe), q.x, q.y, q.birthtime)
+
+        #The pending events, in the order they are due.
+        entries = sorted(world.scheduler.queue, key=lambda e: e[:2])
+        out += COUNT.pack(len(entries))
+        for when, n, function, args in entries:
+                out += DOUBLE.pack(when)
+                pack_value(out, function, world)
+                pack_value(out, args, world)
+        return bytes(out)
+
+#Returns a new world in the state stored in the snapshot.
+def loads(data, swarm=Swarm):
+        magic, version = HEADER.unpack_from(data)
+        if magic != MAGIC:
+                raise ValueError('Not a BeeHive snapshot')
+        if version != VERSION:
+                raise ValueError('BeeHive snapshot of unsupported version %i' % version)
+        offset = HEADER.size
+
+        setup = SETUP.unpack_from(data, offset)
+        offset += SETUP.size
+        width, height, tick_rate, seed = setup[:4]
+        world = World(width, height, swarm=swarm, seed=seed, tick_rate=tick_rate, params=Parameters(*(int(v) for v in setup[4:])))
+        world.scheduler.clear()
+        world.events = []
+
+        (world.t, world.time, world.accumulator, world.speed_limit, buzzing, world.time_last_buzz,
+                thunder, world.time_last_thunder,
+                world.score, world.lives, over, world.bees_killed, world.pickups_collected, world.lives_lost,
+                world.thunderbolts) = WORLD.unpack_from(data, offset)
+        world.buzzing = bool(buzzing)
+        world.thunder = bool(thunder)
+        world.over = bool(over)
+        offset += WORLD.size
+
+        state = RANDOM.unpack_from(data, offset)
+        offset += RANDOM.size
+        world.random.setstate((state[0], state[1:626], state[627] if state[626] else None))
+
+        p = world.player
+        (p.x, p.y, p.px, p.py, p.honeycombscollected, p.diameter, p.age, p.fully_grown,
+                immune, attack, dying, half_dead, dead, p.immune_until, p.attack_until, p.giant_until) = PLAYER.unpack_from(data, offset)
+        p.immune, p.attack, p.dying, p.half_dead, p.dead = bool(immune), bool(attack), bool(dying), bool(half_dead), bool(dead)
+        offset += PLAYER.size
+
+        #The swarm is created anew, so that a NumpySwarm is seeded from the restored generator.
+        world.swarm = world.swarm_class(world)
+        world.bees = world.swarm.bees
+        n, = COUNT.unpack_from(data, offset)
+        offset += COUNT.size
+        for i in range(n):
+                x, y, px, py, age, speedright, speedup, fully_grown, inHive, dying, dead = BEE.unpack_from(data, offset)
+                offset += BEE.size
+                bee = world.swarm.spawn(x, y, fully_grown)
+                bee.px, bee.py, bee.age, bee.speedright, bee.speedup = px, py, age, speedright, speedup
+                bee.inHive, bee.dead = bool(inHive), bool(dead)
+                if dying:
+                        world.swarm.kill(bee)
+                world.emit('bee_spawned', bee)
+
+        n, = COUNT.unpack_from(data, offset)
+        offset += COUNT.size
+        for i in range(n):
+                kind, colour, x, y, birthtime = PICKUP.unpack_from(data, offset)
+                offset += PICKUP.size
+                world.put_pickup(Pickup(KINDS[kind], x, y, birthtime, COLOURS[colour]))
+
+        n, = COUNT.unpack_from(data, offset)
+        offset += COUNT.size
+        for i in range(n):
+                when, = DOUBLE.unpack_from(data, offset)
+                function, offset = unpack_value(data, offset + DOUBLE.size, world)
+                args, offset = unpack_value(data, offset, world)
+                world.scheduler.at(when, function, *args)
+        return world
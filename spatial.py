@@ -0,0 +1,87 @@
+"""
+A uniform grid for finding the entities close to a point in the hive.
+
+The hive is divided into square cells, and every entity (anything with x, y and
+size attributes) is kept in the cell containing its centre. Entities that move
+are updated with move(), which only touches the grid when the entity crosses
+into another cell. A query only looks at the cells overlapping the square around
+the point, so the cost of checking the player against the bees and pickups depends
+on how crowded the neighbourhood of the player is, not on the size of the hive.
+"""
+
+#The side of a cell in points. Somewhat larger than a fully grown bee.
+CELL_SIZE = 48
+
+class SpatialHash (object):
+        def __init__(self, cell_size=CELL_SIZE):
+                self.cell_size = cell_size
+                self.cells = {} #Maps (column, row) to the entities in the cell, kept in a dict to preserve their order
+                self.keys = {} #Maps each entity to the key of its cell
+                self.max_size = 0 #The size of the largest entity seen, which bounds the reach of a query
+
+        def __len__(self):
+                return len(self.keys)
+
+        def __contains__(self, entity):
+                return entity in self.keys
+
+        def key(self, x, y):
+                c = self.cell_size
+                return (int(x // c), int(y // c))
+
+        def insert(self, entity):
+                key = self.key(entity.x, entity.y)
+                self.keys[entity] = key
+                cell = self.cells.get(key)
+                if cell is None:
+                        cell = self.cells[key] = {}
+                cell[entity] = None
+                if entity.size > self.max_size:
+                        self.max_size = entity.size
+
+        def remove(self, entity):
+                key = self.keys.pop(entity, None)
+                if key is not None:
+                        cell = self.cells[key]
+                        del cell[entity]
+                        if not cell:
+                                del self.cells[key]
+
+        #Updates the cell of an entity after it has moved or changed its size.
+        def move(self, entity):
+                if entity.size > self.max_size:
+                        self.max_size = entity.size
+                key = self.key(entity.x, entity.y)
+                if key != self.keys[entity]:
+                        self.remove(entity)
+                        self.insert(entity)
+
+        def clear(self):
+                self.cells = {}
+                self.keys = {}
+                self.max_size = 0
+
+        #Returns the entities whose centres lie in the cells overlapping the square with
+        #the given centre and half side.
+        def query(self, x, y, radius):
+                c = self.cell_size
+                i0 = int((x - radius) // c)
+                i1 = int((x + radius) // c)
+                j0 = int((y - radius) // c)
+                j1 = int((y + radius) // c)
+                cells = self.cells
+                found = []
+
+                for i in range(i0, i1 + 1):
+                        for j in range(j0, j1 + 1):
+                                cell = cells.get((i, j))
+                                if cell:
+                                        found.extend(cell)
+                return found
+
+        #Returns the entities which may overlap the given entity, i.e. all entities within
+        #reach of it apart from the entity itself. This is used for the player, but works
+        #just as well for checking the bees against each other.
+        def neighbours(self, entity):
+                radius = 0.5 * (entity.size + self.max_size)
+                return [other for other in self.query(entity.x, entity.y, radius) if other is not entity]
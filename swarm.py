@@ -0,0 +1,244 @@
+"""
+A swarm of enemy bees that is moved in one batch with NumPy.
+
+The Swarm in simulation.py moves one bee at a time, which makes the number of bees
+in the hive the main cost of a step. The NumpySwarm below has the same interface,
+but keeps the position, velocity, age and state of every bee in contiguous arrays
+and applies the rules for entering the hive, the random walk (with the speed limit
+and the bouncing off the walls) and the tail spin of the dying bees to all bees at
+once. The random walk draws from the same distributions as BeeState.move, although
+not in the same order, so a seeded game plays out differently with the two swarms.
+
+NumPy is not available in every Pythonista installation, so this module is optional:
+
+        from swarm import NumpySwarm
+        world = World(width, height, swarm=NumpySwarm)
+"""
+
+import simulation
+
+try:
+        import numpy as np
+except ImportError:
+        np = None
+
+#The state of the bees, with one entry per bee in each array.
+class Columns (object):
+        def __init__(self, capacity):
+                self.x = np.zeros(capacity)
+                self.y = np.zeros(capacity)
+                self.px = np.zeros(capacity)
+                self.py = np.zeros(capacity)
+                self.speedright = np.zeros(capacity)
+                self.speedup = np.zeros(capacity)
+                self.age = np.zeros(capacity)
+                self.fully_grown = np.zeros(capacity)
+                self.inHive = np.zeros(capacity, dtype=bool)
+                self.dying = np.zeros(capacity, dtype=bool)
+                self.dead = np.zeros(capacity, dtype=bool)
+
+        def __len__(self):
+                return len(self.x)
+
+        def copy_row(self, source, target):
+                for name in FIELDS:
+                        column = getattr(self, name)
+                        column[target] = column[source]
+
+        #Returns a copy of the given number of rows, in arrays of the given capacity.
+        def resized(self, capacity, rows):
+                columns = Columns(capacity)
+                for name in FIELDS:
+                        getattr(columns, name)[:rows] = getattr(self, name)[:rows]
+                return columns
+
+        #Returns a copy of a single row, used for the bees leaving the swarm.
+        def row(self, i):
+                columns = Columns(1)
+                for name in FIELDS:
+                        getattr(columns, name)[0] = getattr(self, name)[i]
+                return columns
+
+FIELDS = ('x', 'y', 'px', 'py', 'speedright', 'speedup', 'age', 'fully_grown', 'inHive', 'dying', 'dead')
+
+#An attribute of a bee, read from and written to its row in the columns of the swarm.
+def field(name):
+        def get(self):
+                return getattr(self.columns, name)[self.index].item()
+
+        def set(self, value):
+                getattr(self.columns, name)[self.index] = value
+
+        return property(get, set)
+
+#A bee in a NumpySwarm. It has the same attributes as BeeState, which makes it possible
+#for the world and the Game scene to treat the bees of both swarms alike.
+class SwarmBee (object):
+        __slots__ = ('columns', 'index')
+        kind = simulation.BeeState.kind
+
+        def __init__(self, columns, index):
+                self.columns = columns
+                self.index = index
+
+        x = field('x')
+        y = field('y')
+        px = field('px')
+        py = field('py')
+        speedright = field('speedright')
+        speedup = field('speedup')
+        age = field('age')
+        fully_grown = field('fully_grown')
+        inHive = field('inHive')
+        dying = field('dying')
+        dead = field('dead')
+
+        @property
+        def size(self):
+                return 0.1 * self.age + simulation.OUTLINE
+
+        @property
+        def radius(self):
+                return 0.05 * self.columns.age[self.index] + 0.5 * simulation.OUTLINE
+
+class NumpySwarm (object):
+        def __init__(self, world, capacity=64):
+                if np is None:
+                        raise ImportError('NumpySwarm requires numpy')
+                self.world = world
+                self.columns = Columns(capacity)
+                self.bees = []
+                self.rng = np.random.default_rng(world.random.getrandbits(64))
+
+        def spawn(self, x, y, fully_grown):
+                n = len(self.bees)
+                if n == len(self.columns):
+                        self.columns = self.columns.resized(2 * n, n)
+                        for bee in self.bees:
+                                bee.columns = self.columns
+
+                c = self.columns
+                c.x[n] = x
+                c.y[n] = y
+                c.px[n] = x
+                c.py[n] = y
+                c.speedright[n] = 0
+                c.speedup[n] = 0
+                c.age[n] = 0
+                c.fully_grown[n] = fully_grown
+                c.inHive[n] = False
+                c.dying[n] = False
+                c.dead[n] = False
+
+                bee = SwarmBee(c, n)
+                self.bees.append(bee)
+                return bee
+
+        #Removes a bee by moving the last bee of the swarm into its row. The removed bee
+        #keeps a copy of its final state.
+        def remove(self, bee):
+                i = bee.index
+                last = len(self.bees) - 1
+                bee.columns = self.columns.row(i)
+                bee.index = 0
+
+                if i != last:
+                        self.columns.copy_row(last, i)
+                        moved = self.bees[last]
+                        moved.index = i
+                        self.bees[i] = moved
+                self.bees.pop()
+
+        #Lets the bee go into its tail spin.
+        def kill(self, bee):
+                bee.dying = True
+
+        #Advances all bees by one step and returns the bees that hit the floor of the
+        #hive during the step. See BeeState for the rules applied to each bee.
+        def step(self):
+                n = len(self.bees)
+                if n == 0:
+                        return []
+
+                w = self.world
+                c = self.columns
+                x = c.x[:n]
+                y = c.y[:n]
+                age = c.age[:n]
+                inHive = c.inHive[:n]
+                dying = c.dying[:n]
+                k = w.scale
+                c.px[:n] = x
+                c.py[:n] = y
+
+                #The bees that have not yet entered the hive grow until they reach their full size.
+                entering = ~inHive
+                if entering.any():
+                        target = np.floor((1 + (w.t / 240)) * c.fully_grown[:n])
+                        growing = entering & (age < target)
+                        age[growing] = np.minimum(age[growing] + k, target[growing])
+                        inHive |= entering & ~growing
+
+                #Every walk_every ticks, the bees in the hive change their velocity in a random fashion.
+                if w.time % w.walk_every == 0:
+                        moving = np.flatnonzero(inHive & ~c.dead[:n])
+                        if len(moving):
+                                c.speedright[moving] = v = self.walk(c.speedright[moving], x[moving], w.width)
+                                c.speedup[moving] = u = self.walk(c.speedup[moving], y[moving], w.height)
+                                x[moving] += w.stride * v
+                                y[moving] += w.stride * u
+
+                #The dying bees go into a tail spin, and die as their age reaches 90.
+                dead = []
+                spinning = np.flatnonzero(dying)
+                if len(spinning):
+                        r = age[spinning]
+                        falling = r > 90
+                        s = 0.5 * r / c.fully_grown[spinning]
+                        radius = s * 12
+                        angle1 = (r / 15) * 2 * 3.14
+                        angle2 = ((r + k) / 15) * 2 * 3.14
+                        x[spinning] += np.where(falling, radius * (np.cos(angle2) - np.cos(angle1)), 0)
+                        y[spinning] += np.where(falling, radius * (np.sin(angle2) - np.sin(angle1)), 0)
+                        age[spinning] = np.where(falling, np.maximum(90, r - k), r)
+
+                        for i in spinning[r == 90]:
+                                c.dead[i] = True
+                                dead.append(self.bees[i])
+
+                for bee in dead:
+                        self.remove(bee)
+                return dead
+
+        #Changes the velocity v of the bees at positions p in the same way as BeeState.move:
+        #Bees above the speed limit slow down, and bees flying out of bounds turn around.
+        def walk(self, v, p, bound):
+                k = len(v)
+                limit = self.world.speed_limit
+                speed = self.world.params.bee_speed
+                slowing = self.rng.integers(0, speed + 1, k)
+                random = self.rng.integers(-speed, speed + 1, k)
+
+                v = np.where(v > limit, v - slowing, np.where(v < -limit, v + slowing, v + random))
+                return np.where(((p < 0) & (v < 0)) | ((p > bound) & (v > 0)), -v, v)
+
+        #Returns the positions of the bees alpha of the way between their positions at the last
+        #two ticks, their ages and whether they are dying, as lists in the order of self.bees.
+        #This is how the Game scene reads the state of all bees once per frame.
+        def frame(self, alpha):
+                n = len(self.bees)
+                c = self.columns
+                px = c.px[:n]
+                py = c.py[:n]
+                x = px + alpha * (c.x[:n] - px)
+                y = py + alpha * (c.y[:n] - py)
+                return x.tolist(), y.tolist(), c.age[:n].tolist(), c.dying[:n].tolist()
+
+        #Returns the bees which may overlap the given entity.
+        def near(self, entity):
+                n = len(self.bees)
+                c = self.columns
+                dx = c.x[:n] - entity.x
+                dy = c.y[:n] - entity.y
+                reach = 0.5 * (0.1 * c.age[:n] + simulation.OUTLINE + entity.size)
+                return [self.bees[i] for i in np.flatnonzero(dx * dx + dy * dy < reach * reach)]
@@ -0,0 +1,207 @@
+"""
+Reading the tilt of the phone.
+
+The game used to read the gravity sensor once per frame, in the update loop, calibrate
+the neutral position of the phone from the first reading of a game, and turn the raw
+readings into the movement of the player inside the world. The TiltInput below takes
+all of this out of the frame: A thread of its own samples a source of readings at a
+fixed rate, smooths them with a filter, and keeps the velocity of the player ready to
+be read by the update loop. The velocity (u, v) is relative to the player's top speed,
+with a length of 1 in each direction being the top speed (see World.update_player).
+
+The neutral position is the average of the first samples taken after calibrate() is
+called, rather than a single reading, and a small dead zone around it keeps the player
+still while the phone is held still.
+
+Nothing here depends on the thread: Calling update(dt) takes one sample, so that a
+TiltInput fed by a SyntheticSource can be run (and tested) headless:
+
+        tilt = TiltInput(SyntheticSource(lambda t: (0.3 * math.sin(t), 0)))
+        for i in range(60):
+                tilt.update(1 / 60)
+        u, v = tilt.velocity()
+"""
+
+import math
+import threading
+import time
+
+try:
+        import motion
+except ImportError:
+        motion = None
+
+#The readings of the gravity sensor, from Pythonista's motion module, or from scene.gravity
+#where the motion module is not available.
+class GravitySource (object):
+        def start(self):
+                if motion is not None:
+                        motion.start_updates()
+
+        def stop(self):
+                if motion is not None:
+                        motion.stop_updates()
+
+        def read(self, t):
+                if motion is not None:
+                        g = motion.get_gravity()
+                        return g[0], g[1]
+                import scene
+                g = scene.gravity()
+                return g.x, g.y
+
+#Readings given by a function of the time in seconds since the source was started.
+class SyntheticSource (object):
+        def __init__(self, function):
+                self.function = function
+
+        def start(self):
+                pass
+
+        def stop(self):
+                pass
+
+        def read(self, t):
+                return self.function(t)
+
+#Returns the smoothing factor of an exponential filter with the given cutoff frequency (in Hz)
+#for a sample taken dt seconds after the last.
+def smoothing(cutoff, dt):
+        tau = 1 / (2 * math.pi * cutoff)
+        return dt / (tau + dt)
+
+#Follows the readings with an exponential moving average. The time constant (in seconds) sets
+#how quickly the filtered value catches up with the readings.
+class ExponentialFilter (object):
+        def __init__(self, time_constant=0.05):
+                self.time_constant = time_constant
+                self.value = None
+
+        def reset(self):
+                self.value = None
+
+        def __call__(self, x, dt):
+                if self.value is None:
+                        self.value = x
+                else:
+                        self.value += dt / (self.time_constant + dt) * (x - self.value)
+                return self.value
+
+#The 1€ filter of Casiez, Roussel and Vogel: An exponential filter whose cutoff frequency
+#rises with the speed of the readings, which removes the jitter while the phone is held still
+#without lagging behind as it is tilted quickly. min_cutoff is the cutoff (in Hz) at rest, and
+#beta how much it rises per unit of speed.
+class OneEuroFilter (object):
+        def __init__(self, min_cutoff=1.0, beta=2.0, d_cutoff=1.0):
+                self.min_cutoff = min_cutoff
+                self.beta = beta
+                self.d_cutoff = d_cutoff #The cutoff of the filter of the speed
+                self.value = None
+                self.speed = 0
+
+        def reset(self):
+                self.value = None
+                self.speed = 0
+
+        def __call__(self, x, dt):
+                if self.value is None or dt <= 0:
+                        if self.value is None:
+                                self.value = x
+                        return self.value
+                self.speed += smoothing(self.d_cutoff, dt) * ((x - self.value) / dt - self.speed)
+                cutoff = self.min_cutoff + self.beta * abs(self.speed)
+                self.value += smoothing(cutoff, dt) * (x - self.value)
+                return self.value
+
+class TiltInput (object):
+        def __init__(self, source, filter=OneEuroFilter, rate=100, calibration=30, dead_zone=0.05):
+                self.source = source
+                self.filters = (filter(), filter()) #One filter for each axis
+                self.rate = rate #The number of samples per second taken by the thread
+                self.calibration = calibration #The number of samples averaged for the neutral position
+                self.dead_zone = dead_zone
+                self.t = 0 #The time of the last sample, in seconds since the source was started
+                self.thread = None
+                self.running = False
+                self.errors = [] #The errors raised while taking samples on the thread
+                #Held while a sample is taken and while the calibration starts over, which happen
+                #on different threads.
+                self.lock = threading.Lock()
+                self.calibrate()
+
+        #Starts over the calibration: The neutral position is taken from the next samples, and
+        #the player stands still until it has been.
+        def calibrate(self):
+                with self.lock:
+                        self.reset()
+
+        def reset(self):
+                self.samples = 0
+                self.sum_x = 0
+                self.sum_y = 0
+                self.neutral = None #The neutral (x, y) and the distance to the limit of the sensor in each direction
+                self.current = (0, 0) #Replaced as a whole, so the update loop always reads a consistent pair
+                for f in self.filters:
+                        f.reset()
+
+        #The velocity of the player, as of the last sample.
+        def velocity(self):
+                return self.current
+
+        #Takes one sample, dt seconds after the last.
+        def update(self, dt):
+                with self.lock:
+                        self.sample(dt)
+
+        def sample(self, dt):
+                self.t += dt
+                x, y = self.source.read(self.t)
+                if self.neutral is None:
+                        self.samples += 1
+                        self.sum_x += x
+                        self.sum_y += y
+                        if self.samples >= self.calibration:
+                                nx = self.sum_x / self.samples
+                                ny = self.sum_y / self.samples
+                                self.neutral = (nx, ny, max(0.1, min(1 - nx, 1 + nx)), max(0.1, min(1 - ny, 1 + ny)))
+                        return
+
+                fx, fy = self.filters
+                nx, ny, range_x, range_y = self.neutral
+                self.current = (self.scale((fx(x, dt) - nx) / range_x), self.scale((fy(y, dt) - ny) / range_y))
+
+        #Applies the dead zone, and caps the velocity at the top speed.
+        def scale(self, u):
+                if abs(u) <= self.dead_zone:
+                        return 0
+                return max(-1, min(1, u))
+
+        #Starts the thread taking the samples.
+        def start(self):
+                if self.thread is None:
+                        self.source.start()
+                        self.running = True
+                        self.thread = threading.Thread(target=self.run, name='TiltInput')
+                        self.thread.daemon = True
+                        self.thread.start()
+
+        def stop(self):
+                self.running = False
+                if self.thread is not None:
+                        self.thread.join(1)
+                        self.thread = None
+                        self.source.stop()
+
+        def run(self):
+                interval = 1 / self.rate
+                last = time.perf_counter()
+                while self.running:
+                        time.sleep(interval)
+                        now = time.perf_counter()
+                        try:
+                                self.update(now - last)
+                        except Exception as e:
+                                #A failed sample is dropped, and the thread goes on with the next.
+                                if len(self.errors) < 100:
+                                        self.errors.append(e)
+                        last = now